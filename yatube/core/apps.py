@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import configure_sqlite
+        from .metrics import instrument_templates
+        from .querylog import install_query_inspector
+        instrument_templates()
+        connection_created.connect(configure_sqlite)
+        connection_created.connect(install_query_inspector)
@@ -0,0 +1,50 @@
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(path, keep=True):
+    """Переключает соединение default на отдельный файл SQLite.
+
+    Схема создаётся миграциями, как для тестовой базы. При keep=True
+    файл с засеянными данными остаётся и переиспользуется следующими
+    запусками, рабочая база при этом не затрагивается.
+    """
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings['NAME']
+    old_name = connection.settings_dict['NAME']
+    test_settings['NAME'] = path
+    try:
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=keep)
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keep)
+        test_settings['NAME'] = old_test_name
+
+
+def measure(func, repeat):
+    """Вызывает func repeat раз и возвращает время вызовов в мс."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(timings, percent):
+    ordered = sorted(timings)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def explain(queryset):
+    """Возвращает строки EXPLAIN QUERY PLAN для запроса SQLite."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
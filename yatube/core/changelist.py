@@ -0,0 +1,57 @@
+from django.contrib.admin.views.main import ChangeList
+
+from .paginator import KeysetPaginator
+
+CURSOR_VAR = 'cursor'
+# Дальше этого числа записи выборки не считаются
+COUNT_LIMIT = 1000
+
+
+class KeysetChangeList(ChangeList):
+    """Список объектов админки с переходом по курсору вместо OFFSET.
+
+    Порядок задаёт ordering модели админки, сортировка по колонкам
+    отключается (sortable_by = ()), иначе курсор потеряет смысл.
+    Общий счётчик без фильтров не считается, а выборка - только
+    до COUNT_LIMIT записей: COUNT(*) по LIMIT-подзапросу.
+    """
+
+    count_limit = COUNT_LIMIT
+
+    def __init__(self, request, *args, **kwargs):
+        # Курсор - не фильтр: ChangeList принял бы его за поле модели
+        self.cursor = request.GET.get(CURSOR_VAR)
+        if self.cursor is not None:
+            request.GET = request.GET.copy()
+            del request.GET[CURSOR_VAR]
+        super().__init__(request, *args, **kwargs)
+
+    def get_results(self, request):
+        paginator = KeysetPaginator(
+            self.queryset, self.list_per_page, self.model_admin.ordering)
+        page = paginator.get_cursor_page(self.cursor)
+        self.result_count = self.queryset.order_by()[
+            :self.count_limit + 1].count()
+        self.result_count_capped = self.result_count > self.count_limit
+        self.result_count = min(self.result_count, self.count_limit)
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = page.object_list
+        self.can_show_all = False
+        self.multi_page = page.has_next() or page.has_previous()
+        self.paginator = paginator
+        self.page = page
+
+    def cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: cursor})
+
+    @property
+    def previous_url(self):
+        return self.cursor_url(self.page.previous_cursor)
+
+    @property
+    def next_url(self):
+        return self.cursor_url(self.page.next_cursor)
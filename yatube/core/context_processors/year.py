@@ -1,9 +1,27 @@
-from datetime import date
+import time
+from datetime import date, datetime, timedelta
+
+
+def _year_until():
+    """Текущий год и момент (timestamp), до которого он не изменится."""
+    today = date.today()
+    midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    return today.year, midnight.timestamp()
+
+
+_current = _year_until()
+
+
+def current_year():
+    """Текущий год; дата пересчитывается только после полуночи."""
+    global _current
+    if time.time() >= _current[1]:
+        _current = _year_until()
+    return _current[0]
 
 
 def year(request):
     """Добавляет переменную с текущим годом."""
-    current_date = date.today()
     return {
-        'year': current_date.year
+        'year': current_year()
     }
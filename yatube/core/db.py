@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Выполняет SQLITE_PRAGMAS для нового соединения SQLite.
+
+    Подключается к сигналу connection_created, поэтому срабатывает
+    один раз на соединение; при CONN_MAX_AGE > 0 - реже, чем раз
+    на запрос.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,106 @@
+import os
+import statistics
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, measure, percentile
+from posts.benchmark import seed
+
+User = get_user_model()
+
+YEAR_PROCESSOR = 'core.context_processors.year.year'
+EAGER_YEAR_PROCESSOR = f'{__name__}.eager_year'
+# Свой кеш лент на время замера: DummyCache ничего не хранит, поэтому
+# каждая страница рендерится заново, а общий кеш 'default' не трогается
+BENCH_CACHE_ALIAS = 'bench_context_processors'
+
+
+def eager_year(request):
+    """Прежняя реализация year: date.today() на каждый рендеринг."""
+    return {'year': date.today().year}
+
+
+def with_processor(templates, old, new):
+    """Копия TEMPLATES, в которой контекст-процессор old заменён на new."""
+    return [
+        {
+            **backend,
+            'OPTIONS': {
+                **backend['OPTIONS'],
+                'context_processors': [
+                    new if path == old else path
+                    for path in backend['OPTIONS'].get(
+                        'context_processors', [])
+                ],
+            },
+        }
+        for backend in templates
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время отрисовки страниц «Об авторе», «Технологии» '
+            'и главной ленты с прежним и текущим контекст-процессором year, '
+            'для гостя и вошедшего пользователя')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--db-file',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров; засеянные данные переиспользуются')
+
+    def handle(self, *args, **options):
+        urls = (
+            ('about/author', reverse('about:author')),
+            ('about/tech', reverse('about:tech')),
+            ('index', reverse('posts:index')),
+        )
+        modes = (
+            ('date.today()', with_processor(
+                settings.TEMPLATES, YEAR_PROCESSOR, EAGER_YEAR_PROCESSOR)),
+            ('кеш года', settings.TEMPLATES),
+        )
+        caches = {
+            **settings.CACHES,
+            BENCH_CACHE_ALIAS: {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            },
+        }
+        with benchmark_database(options['db_file']), override_settings(
+                CACHES=caches, FEED_CACHE_ALIAS=BENCH_CACHE_ALIAS):
+            seed(options['posts'], options['authors'], options['groups'],
+                 self.stdout)
+            user, _ = User.objects.get_or_create(username='bench_context')
+            member = Client()
+            member.force_login(user)
+            for title, client in (('гость', Client()),
+                                  ('пользователь', member)):
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{title}:'))
+                for name, url in urls:
+                    self.stdout.write(f'  {name}:')
+                    for mode, templates in modes:
+                        with override_settings(TEMPLATES=templates):
+                            timings = self.page_times(
+                                client, url, options['repeat'])
+                        self.stdout.write(
+                            f'    {mode:<14} '
+                            f'p50 {statistics.median(timings):.3f} мс, '
+                            f'p95 {percentile(timings, 95):.3f} мс')
+
+    @staticmethod
+    def page_times(client, url, repeat):
+        """Время ответа страницы в мс, включая рендеринг шаблонов."""
+        def get():
+            client.get(url)
+
+        get()
+        return measure(get, repeat)
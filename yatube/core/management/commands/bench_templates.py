@@ -0,0 +1,87 @@
+import os
+import re
+import statistics
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, percentile
+from core.template_cache import (CACHED_LOADERS, FILE_LOADERS, warm_templates,
+                                 with_loaders)
+from posts.benchmark import seed
+from posts.models import Post
+
+TEMPLATE_TIMING = re.compile(r'tpl;dur=([\d.]+)')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга лент с загрузкой шаблонов '
+            'с диска на каждый запрос и с кеширующим загрузчиком')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--db-file',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров; засеянные данные переиспользуются')
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['db_file']):
+            seed(options['posts'], options['authors'], options['groups'],
+                 self.stdout)
+            post = Post.objects.exclude(group=None).select_related(
+                'author', 'group').first()
+            urls = (
+                ('index', reverse('posts:index')),
+                ('group', reverse('posts:group_list',
+                                  args=[post.group.slug])),
+                ('profile', reverse('posts:profile',
+                                    args=[post.author.username])),
+            )
+            modes = (
+                ('с диска', with_loaders(settings.TEMPLATES, FILE_LOADERS)),
+                ('кеш', with_loaders(settings.TEMPLATES, CACHED_LOADERS)),
+            )
+            results = {}
+            for mode, templates in modes:
+                with override_settings(TEMPLATES=templates,
+                                       REQUEST_METRICS_SAMPLE_RATE=1):
+                    warm_templates()
+                    for name, url in urls:
+                        results[name, mode] = self.render_times(
+                            url, options['repeat'])
+        self.report(urls, modes, results)
+
+    @staticmethod
+    def render_times(url, repeat):
+        """Время шаблонов на запрос в мс из заголовка Server-Timing."""
+        client = Client()
+        timings = []
+        for _ in range(repeat):
+            # Кеш ленты отдал бы готовый ответ без рендеринга
+            caches[settings.FEED_CACHE_ALIAS].clear()
+            response = client.get(url)
+            timings.append(float(
+                TEMPLATE_TIMING.search(response['Server-Timing']).group(1)))
+        return timings
+
+    def report(self, urls, modes, results):
+        for name, _ in urls:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+            medians = []
+            for mode, _ in modes:
+                timings = results[name, mode]
+                medians.append(statistics.median(timings))
+                self.stdout.write(
+                    f'  {mode:<8} p50 {medians[-1]:.2f} мс, '
+                    f'p95 {percentile(timings, 95):.2f} мс')
+            uncached, cached = medians
+            self.stdout.write(self.style.SUCCESS(
+                f'  рендеринг быстрее на {uncached - cached:.2f} мс '
+                f'({(1 - cached / uncached) * 100:.0f}%)'))
@@ -0,0 +1,197 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import ExitStack
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlencode, urlsafe_base64_encode
+
+from core.benchmark import benchmark_database, percentile
+from posts.benchmark import seed
+from posts.models import Post
+
+# Наборы данных: постов, авторов, групп
+DATASETS = {
+    '10k': (10_000, 2000, 1000),
+    '100k': (100_000, 5000, 2000),
+    '1m': (1_000_000, 10_000, 5000),
+}
+URLCONFS = (
+    ('posts', 'posts.urls'),
+    ('users', 'users.urls'),
+    ('about', 'about.urls'),
+)
+# GET-параметры для адресов, которые без них почти ничего не делают
+QUERY_STRINGS = {
+    'posts:search': lambda post: urlencode({'q': post.text.split()[0]}),
+}
+# Допустимый рост p95 относительно базовой линии
+LATENCY_TOLERANCE = 0.25
+
+
+def named_routes():
+    """Имена маршрутов приложений вместе с именами их аргументов."""
+    for namespace, module in URLCONFS:
+        for pattern in import_module(module).urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield (f'{namespace}:{pattern.name}',
+                       list(pattern.pattern.converters))
+
+
+def route_kwargs(user, post):
+    return {
+        'post_id': post.pk,
+        'slug': post.group.slug,
+        'username': user.username,
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Засеивает базу и прогоняет все именованные адреса posts, '
+            'users и about: p50/p95, запросы к БД и память на запрос; '
+            'сравнивает результат с сохранённой базовой линией')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset', choices=DATASETS, default='10k')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш между запросами')
+        parser.add_argument('--db-file', help='Файл базы для набора данных')
+        parser.add_argument('--baseline', help='JSON с базовой линией')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результат как новую базовую линию')
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        db_file = options['db_file'] or os.path.join(
+            settings.BASE_DIR, f'bench-{dataset}.sqlite3')
+        baseline = options['baseline'] or os.path.join(
+            settings.BASE_DIR, f'bench-baseline-{dataset}.json')
+        with benchmark_database(db_file):
+            seed(*DATASETS[dataset], self.stdout)
+            results = self.run(options['repeat'], options['warm'])
+        self.print_results(results)
+        if options['save_baseline']:
+            with open(baseline, 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Базовая линия записана в {baseline}')
+            return
+        if os.path.exists(baseline):
+            with open(baseline, encoding='utf-8') as file:
+                self.compare(results, json.load(file))
+
+    def run(self, repeat, warm):
+        post = Post.objects.exclude(group=None).select_related(
+            'author', 'group').first()
+        user = post.author
+        user.is_staff = True
+        user.save(update_fields=['is_staff'])
+        kwargs = route_kwargs(user, post)
+        guest_client = Client()
+        user_client = Client()
+        results = {}
+        for name, arguments in named_routes():
+            url = reverse(name, kwargs={
+                argument: kwargs[argument] for argument in arguments})
+            if name in QUERY_STRINGS:
+                url += '?' + QUERY_STRINGS[name](post)
+            client = guest_client
+            if self.redirects_to_login(guest_client.get(url)):
+                client = user_client
+
+            def request():
+                if client is user_client:
+                    # Выход из аккаунта в одном из адресов не должен
+                    # ломать следующие замеры
+                    user_client.force_login(user)
+                if not warm:
+                    caches[settings.FEED_CACHE_ALIAS].clear()
+                return self.timed_get(client, url)
+
+            samples = [request() for _ in range(repeat)]
+            timings = [elapsed for elapsed, _, _ in samples]
+            tracemalloc.start()
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {
+                'url': url,
+                'status': samples[-1][2],
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'queries': samples[-1][1],
+                'peak_kib': round(peak / 1024, 1),
+            }
+        return results
+
+    @staticmethod
+    def redirects_to_login(response):
+        login_urls = (reverse(settings.LOGIN_URL), reverse('admin:login'))
+        return (response.status_code == 302
+                and response.url.startswith(login_urls))
+
+    @staticmethod
+    def timed_get(client, url):
+        """Время ответа в мс, число запросов к БД и статус.
+
+        У потокового ответа время считается до первого куска данных.
+        Запросы считаются по всем базам: чтения могут уйти на реплику.
+        """
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connection))
+                for connection in connections.all()
+            ]
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                next(iter(response.streaming_content), None)
+            elapsed = (time.perf_counter() - started) * 1000
+            response.close()
+        queries = sum(len(queries) for queries in captured)
+        return elapsed, queries, response.status_code
+
+    def print_results(self, results):
+        header = (f'{"адрес":<34} {"код":>4} {"p50, мс":>9} {"p95, мс":>9} '
+                  f'{"SQL":>4} {"память, КиБ":>12}')
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<34} {result["status"]:>4} {result["p50_ms"]:>9} '
+                f'{result["p95_ms"]:>9} {result["queries"]:>4} '
+                f'{result["peak_kib"]:>12}')
+
+    def compare(self, results, baseline):
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            limit = base['p95_ms'] * (1 + LATENCY_TOLERANCE)
+            if result['p95_ms'] > limit:
+                regressions.append(
+                    f'{name}: p95 {result["p95_ms"]} мс > {limit:.2f} мс')
+            if result['queries'] > base['queries']:
+                regressions.append(
+                    f'{name}: {result["queries"]} запросов к БД '
+                    f'вместо {base["queries"]}')
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базовой линии:\n'
+                + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+# Границы корзин гистограмм: миллисекунды и число запросов к БД
+TIME_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Замер текущего запроса; None, если запрос не попал в выборку
+current_timer = ContextVar('current_timer', default=None)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами: память не растёт
+    с числом наблюдений."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Верхняя граница корзины, в которую попадает квантиль q.
+
+        None означает «больше последней границы» или пустую гистограмму.
+        """
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.bounds + (None,), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def as_dict(self):
+        labels = [f'<={bound}' for bound in self.bounds] + [
+            f'>{self.bounds[-1]}']
+        return {
+            'count': self.total,
+            'sum': round(self.sum, 3),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class RequestTimer:
+    """Счётчики одного запроса: запросы к БД, время БД и шаблонов."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Используется как execute_wrapper соединения с БД
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self.started
+
+
+class Registry:
+    """Гистограммы по представлениям, общие для потоков процесса."""
+
+    METRICS = (
+        ('queries', QUERY_BUCKETS),
+        ('db_ms', TIME_BUCKETS),
+        ('template_ms', TIME_BUCKETS),
+        ('total_ms', TIME_BUCKETS),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, timer):
+        values = {
+            'queries': timer.queries,
+            'db_ms': timer.db_time * 1000,
+            'template_ms': timer.template_time * 1000,
+            'total_ms': timer.wall_time * 1000,
+        }
+        with self.lock:
+            histograms = self.views.get(view_name)
+            if histograms is None:
+                histograms = self.views[view_name] = {
+                    name: Histogram(bounds) for name, bounds in self.METRICS
+                }
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view_name: {
+                    name: histogram.as_dict()
+                    for name, histogram in histograms.items()
+                }
+                for view_name, histograms in self.views.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
+
+
+def instrument_templates():
+    """Оборачивает рендеринг шаблонов бэкенда Django замером времени
+    и запоминает имя шаблона для журнала запросов.
+
+    Учитывается только внешний render(): вложенные include и extends
+    входят в его время.
+    """
+    from django.template.backends.django import Template
+
+    from .querylog import current_template
+
+    if getattr(Template.render, 'instrumented', False):
+        return
+    original = Template.render
+
+    def render(self, *args, **kwargs):
+        template_token = current_template.set(self.origin.template_name)
+        timer = current_timer.get()
+        if timer is None:
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                current_template.reset(template_token)
+        timer.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            current_template.reset(template_token)
+            timer.template_depth -= 1
+            if not timer.template_depth:
+                timer.template_time += time.perf_counter() - started
+
+    render.instrumented = True
+    Template.render = render
@@ -0,0 +1,194 @@
+import logging
+import mimetypes
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .metrics import RequestTimer, current_timer, registry
+from .querylog import QueryLog, current_log
+from .routers import SAFE_METHODS
+from .storage import collected_files
+
+logger = logging.getLogger('core.querylog')
+
+
+def accepted_encodings(header):
+    """Разбирает Accept-Encoding в словарь {кодировка: q}.
+
+    Кодировка без q имеет вес 1, q=0 означает «не принимаю»,
+    x-gzip - старое имя gzip.
+    """
+    weights = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights['gzip' if coding == 'x-gzip' else coding] = weight
+    return weights
+
+
+class RequestMetricsMiddleware:
+    """Считает для выборки запросов число и время запросов к БД,
+    время шаблонов и полное время ответа.
+
+    Результат уходит в заголовок Server-Timing и в гистограммы
+    по представлениям, которые отдаёт страница метрик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        registry.record(view_name, timer)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timer.db_time * 1000:.2f};desc="{timer.queries} SQL"',
+            f'tpl;dur={timer.template_time * 1000:.2f}',
+            f'total;dur={timer.wall_time * 1000:.2f}',
+        ))
+        return response
+
+
+class QueryLogMiddleware:
+    """Следит за запросами к БД в пределах HTTP-запроса.
+
+    Повторяющиеся формы запросов (признак N+1) пишутся в журнал
+    с именем представления. При QUERY_BUDGET_STRICT превышение
+    QUERY_BUDGET или DUPLICATE_QUERY_LIMIT сразу роняет запрос, чтобы
+    тесты ловили регрессии.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = QueryLog(
+            budget=settings.QUERY_BUDGET,
+            duplicates=settings.DUPLICATE_QUERY_LIMIT,
+            strict=settings.QUERY_BUDGET_STRICT,
+        )
+        token = current_log.set(log)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_log.reset(token)
+        for sql, count, origin in log.repeated():
+            logger.warning(
+                'Запрос повторён %d раз в %s: %s', count, origin, sql)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        log = current_log.get()
+        if log is not None and request.resolver_match:
+            log.view_name = request.resolver_match.view_name
+
+
+class StickyPrimaryMiddleware:
+    """После запроса с записью ставит cookie, по которой read_replica
+    ещё REPLICA_STICKY_SECONDS секунд читает из основной базы:
+    автор сразу видит свой пост, даже если реплика отстаёт."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику без URL-роутинга, сессий и метрик.
+
+    Выбирает сжатый вариант с наибольшим q в Accept-Encoding, при
+    равных весах - .br, затем .gz.
+    Файлы с хешем в имени кешируются браузером навсегда (immutable),
+    остальные - на STATIC_MAX_AGE секунд. Список файлов читается
+    из STATIC_ROOT один раз при старте процесса.
+    Включается настройкой SERVE_STATIC.
+    """
+
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = dict(collected_files(settings.STATIC_ROOT))
+        self.hashed = set(getattr(staticfiles_storage, 'hashed_files', {})
+                          .values())
+
+    def __call__(self, request):
+        if (request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(self.prefix)):
+            return self.get_response(request)
+        name = request.path[len(self.prefix):]
+        path = self.files.get(name)
+        if path is None:
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                                  stat.st_mtime, stat.st_size):
+            return HttpResponseNotModified()
+        content_type, _ = mimetypes.guess_type(name)
+        weights = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding, best = None, 0.0
+        for candidate, extension in self.ENCODINGS:
+            variant = self.files.get(name + extension)
+            weight = weights.get(candidate, weights.get('*', 0.0))
+            if variant and weight > best:
+                encoding, path, best = candidate, variant, weight
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Vary'] = 'Accept-Encoding'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if name in self.hashed:
+            response['Cache-Control'] = self.IMMUTABLE
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}')
+        return response
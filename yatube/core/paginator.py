@@ -0,0 +1,159 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+# Направления курсора: записи после граничной строки или до неё.
+# Курсор PREVIOUS без граничной строки означает последнюю страницу.
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class KeysetPage(Page):
+    """Страница, границы которой заданы курсорами, а не номером."""
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        if self.number is None:
+            return '<Page (keyset)>'
+        return super().__repr__()
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+    def has_previous(self):
+        if self._has_previous is None:
+            return super().has_previous()
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+    @property
+    def last_cursor(self):
+        return self.paginator.encode_cursor(None, PREVIOUS)
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод по ключу сортировки (seek-пагинация).
+
+    Вместо OFFSET и COUNT(*) следующая страница выбирается условием
+    «строго после последней показанной записи», поэтому стоимость
+    запроса не зависит от глубины страницы. Номера страниц
+    (``get_page``) продолжают работать для старых ссылок.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-pk'), **kwargs):
+        self.ordering = tuple(ordering)
+        super().__init__(object_list.order_by(*self.ordering), per_page,
+                         **kwargs)
+
+    def _get_page(self, object_list, number, paginator):
+        return KeysetPage(list(object_list), number, paginator)
+
+    def _fields(self):
+        return [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+
+    def _to_python(self, name, value):
+        opts = self.object_list.model._meta
+        try:
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+        except FieldDoesNotExist:
+            # Аннотированные поля (например, ранг поиска) храним как есть.
+            return value
+        return field.to_python(value)
+
+    def encode_cursor(self, obj, direction):
+        values = None
+        if obj is not None:
+            values = [
+                getattr(obj, name) for name, _ in self._fields()
+            ]
+            values = [
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in values
+            ]
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, значения) или None для битого курсора."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in (NEXT, PREVIOUS):
+                return None
+            if values is not None:
+                fields = self._fields()
+                if len(values) != len(fields):
+                    return None
+                values = [
+                    self._to_python(name, value)
+                    for (name, _), value in zip(fields, values)
+                ]
+            return direction, values
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def _seek_filter(self, values, forward):
+        """Условие «строго после (или до) строки с ключом values»."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        # Избыточная граница по первому полю превращает OR-условие
+        # в диапазон по индексу, и база не перебирает начало ленты
+        name, descending = self._fields()[0]
+        bound = 'lte' if descending == forward else 'gte'
+        return Q(**{f'{name}__{bound}': values[0]}) & condition
+
+    def cursor_queryset(self, cursor=None):
+        """Возвращает (queryset, вперёд ли, граничные значения) для курсора.
+
+        Пустой или некорректный курсор означает первую страницу.
+        """
+        decoded = self.decode_cursor(cursor) if cursor else None
+        direction, values = decoded or (NEXT, None)
+        forward = direction == NEXT
+        queryset = self.object_list
+        if not forward:
+            queryset = queryset.reverse()
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward))
+        return queryset, forward, values
+
+    def get_cursor_page(self, cursor=None):
+        """Возвращает страницу, начинающуюся сразу за курсором."""
+        queryset, forward, values = self.cursor_queryset(cursor)
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            return KeysetPage(rows, None, self, has_next=has_more,
+                              has_previous=values is not None)
+        rows.reverse()
+        return KeysetPage(rows, None, self, has_next=values is not None,
+                          has_previous=has_more)
@@ -0,0 +1,106 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Журнал запросов текущего HTTP-запроса (или блока query_budget)
+current_log = ContextVar('current_query_log', default=None)
+# Внешний шаблон, который сейчас рендерится
+current_template = ContextVar('current_template', default=None)
+
+PLACEHOLDERS = re.compile(r'%s(?:, %s)+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос превысил бюджет запросов к БД или повторов."""
+
+
+def shape(sql):
+    """Форма запроса: списки параметров IN (...) любой длины совпадают."""
+    return PLACEHOLDERS.sub('%s, ...', sql)
+
+
+class QueryLog:
+    """Запросы одного HTTP-запроса: число, формы и бюджет."""
+
+    def __init__(self, view_name=None, budget=None, duplicates=None,
+                 strict=False):
+        self.view_name = view_name
+        self.budget = budget
+        self.duplicates = duplicates
+        self.strict = strict
+        self.count = 0
+        self.shapes = Counter()
+        self.origins = {}
+
+    def add(self, sql):
+        self.count += 1
+        key = shape(sql)
+        self.shapes[key] += 1
+        if key not in self.origins:
+            self.origins[key] = self.origin()
+        if not self.strict:
+            return
+        if self.budget is not None and self.count > self.budget:
+            raise QueryBudgetExceeded(
+                f'{self.origin()}: больше {self.budget} запросов к БД')
+        if (self.duplicates is not None
+                and self.shapes[key] > self.duplicates):
+            raise QueryBudgetExceeded(
+                f'{self.origin()}: запрос повторён {self.shapes[key]} раз: '
+                f'{key}')
+
+    def origin(self):
+        template = current_template.get()
+        origin = self.view_name or 'вне представления'
+        return f'{origin} ({template})' if template else origin
+
+    def repeated(self):
+        """Формы запросов, повторённые больше допустимого:
+        (форма, число повторов, где выполнена впервые)."""
+        limit = self.duplicates or 1
+        return [
+            (sql, count, self.origins[sql])
+            for sql, count in self.shapes.items() if count > limit
+        ]
+
+
+def inspect_query(execute, sql, params, many, context):
+    """execute_wrapper: медленные запросы в журнал, учёт повторов."""
+    log = current_log.get()
+    if log is not None:
+        log.add(sql)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= settings.SLOW_QUERY_MS:
+            logger.warning(
+                'Медленный запрос %.1f мс в %s: %s', duration,
+                log.origin() if log else 'вне запроса', sql)
+
+
+def install_query_inspector(sender, connection, **kwargs):
+    """Обработчик connection_created: вешает проверку на соединение."""
+    if inspect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(inspect_query)
+
+
+@contextmanager
+def query_budget(budget=None, duplicates=None, name='query_budget'):
+    """Падает с QueryBudgetExceeded, если код внутри блока сделал
+    больше budget запросов или повторил одну форму больше duplicates
+    раз. Удобно в тестах горячих страниц."""
+    log = QueryLog(name, budget, duplicates, strict=True)
+    token = current_log.set(log)
+    try:
+        yield log
+    finally:
+        current_log.reset(token)
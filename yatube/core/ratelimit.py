@@ -0,0 +1,110 @@
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+# Корзины одного процесса меняются под общей блокировкой; между
+# процессами (общий кеш) списание приблизительное: чтение и запись
+# корзины не атомарны
+_lock = threading.Lock()
+_rejected = Counter()
+
+
+def parse_rate(rate):
+    """'10/m' -> (ёмкость корзины, токенов в секунду)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+def client_ip(request):
+    """IP клиента: из RATE_LIMIT_IP_HEADER, если сайт за прокси.
+
+    Берётся последний адрес заголовка - его дописал наш прокси,
+    предыдущие мог подставить сам клиент.
+    """
+    header = settings.RATE_LIMIT_IP_HEADER
+    if header:
+        addresses = request.META.get(header, '').split(',')
+        if addresses[-1].strip():
+            return addresses[-1].strip()
+    return request.META['REMOTE_ADDR']
+
+
+def bucket_keys(scope, request):
+    """Пары (ключ корзины, лимит) для запроса: по IP и по пользователю."""
+    limits = settings.RATE_LIMITS.get(scope, {})
+    keys = []
+    if 'ip' in limits:
+        keys.append((f'ratelimit:{scope}:ip:{client_ip(request)}',
+                     limits['ip']))
+    if 'user' in limits and request.user.is_authenticated:
+        keys.append((f'ratelimit:{scope}:user:{request.user.pk}',
+                     limits['user']))
+    return keys
+
+
+def take(keys, now=None):
+    """Списывает по токену из каждой корзины.
+
+    Возвращает 0, если запрос пропущен, или через сколько секунд
+    появится токен во всех корзинах. При отказе ничего не списывается.
+    """
+    cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+    now = time.time() if now is None else now
+    with _lock:
+        stored = cache.get_many([key for key, _ in keys])
+        buckets = []
+        wait = 0
+        for key, rate in keys:
+            capacity, refill = parse_rate(rate)
+            tokens, updated = stored.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            buckets.append((key, tokens, capacity, refill))
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / refill)
+        if wait:
+            return wait
+        for key, tokens, capacity, refill in buckets:
+            # Полная корзина не отличается от отсутствующей
+            cache.set(key, (tokens - 1, now),
+                      timeout=math.ceil(capacity / refill))
+        return 0
+
+
+def rate_limit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к представлению корзиной токенов.
+
+    Лимиты берутся из RATE_LIMITS[scope]: 'ip' - на адрес клиента,
+    'user' - на вошедшего пользователя. Лишние запросы получают
+    ответ 429 с заголовком Retry-After.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            wait = take(bucket_keys(scope, request))
+            if not wait:
+                return view(request, *args, **kwargs)
+            with _lock:
+                _rejected[scope] += 1
+            response = render(
+                request, 'core/429.html', {'path': request.path}, status=429)
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+        return wrapper
+    return decorator
+
+
+def rejected_counts():
+    """Число отклонённых запросов по ограничениям с запуска процесса."""
+    with _lock:
+        return dict(_rejected)
@@ -0,0 +1,63 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+# Реплика, из которой читает текущий запрос; None - основная база
+current_replica = ContextVar('current_replica', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def stuck_to_primary(request):
+    """Пользователь недавно писал и должен видеть свои изменения."""
+    try:
+        until = float(request.COOKIES[settings.REPLICA_STICKY_COOKIE])
+    except (KeyError, ValueError):
+        return False
+    return until > time.time()
+
+
+def read_replica(view):
+    """Направляет чтения представления на одну из DATABASE_REPLICAS.
+
+    Только для безопасных методов и только если пользователь
+    не писал в базу последние REPLICA_STICKY_SECONDS секунд.
+    Декоратор ставится внешним, чтобы запросы condition и кеша ленты
+    тоже шли в реплику.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or request.method not in SAFE_METHODS
+                or stuck_to_primary(request)):
+            return view(request, *args, **kwargs)
+        token = current_replica.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            current_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения внутри read_replica - в реплику, запись - всегда
+    в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики получают схему вместе с данными из основной базы
+        return db == 'default'
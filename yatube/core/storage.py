@@ -0,0 +1,54 @@
+import gzip
+import os
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+# Текстовые форматы: картинки PNG и ICO уже сжаты или почти не жмутся
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.map', '.html')
+
+
+# Пары (расширение, функция сжатия); сжатие однократное, поэтому
+# с наибольшей степенью
+COMPRESSORS = (
+    ('.br', lambda data: brotli.compress(data, quality=11)),
+    ('.gz', lambda data: gzip.compress(data, 9, mtime=0)),
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище collectstatic: имена с хешем содержимого плюс
+    сжатые копии (.br и .gz) рядом с каждым текстовым файлом.
+
+    Сжатие выполняется один раз при сборке, отдаёт готовые файлы
+    core.middleware.StaticFilesMiddleware или веб-сервер.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            with self.open(name) as original:
+                data = original.read()
+            for extension, compress in COMPRESSORS:
+                compressed = compress(data)
+                # Сжатая копия, которая не меньше оригинала, не нужна
+                if len(compressed) >= len(data):
+                    continue
+                compressed_name = name + extension
+                if self.exists(compressed_name):
+                    self.delete(compressed_name)
+                self._save(compressed_name, ContentFile(compressed))
+                yield name, compressed_name, True
+
+
+def collected_files(root):
+    """Относительные пути (через /) всех файлов каталога."""
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            yield os.path.relpath(path, root).replace(os.sep, '/'), path
@@ -0,0 +1,46 @@
+import os
+
+from django.template import engines
+
+FILE_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', FILE_LOADERS)]
+
+
+def with_loaders(templates, loaders):
+    """Копия настройки TEMPLATES с явным списком загрузчиков."""
+    return [
+        {
+            **backend,
+            'APP_DIRS': False,
+            'OPTIONS': {**backend.get('OPTIONS', {}), 'loaders': loaders},
+        }
+        for backend in templates
+    ]
+
+
+def template_names(directory):
+    """Имена всех шаблонов каталога относительно него самого."""
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(('.html', '.txt')):
+                path = os.path.relpath(os.path.join(root, filename), directory)
+                yield path.replace(os.sep, '/')
+
+
+def warm_templates(alias='django'):
+    """Компилирует все шаблоны из DIRS движка и возвращает их число.
+
+    С кеширующим загрузчиком скомпилированные шаблоны остаются
+    в памяти процесса, и первый запрос не платит за разбор файлов.
+    Ошибка синтаксиса в любом шаблоне всплывает сразу при старте.
+    """
+    engine = engines[alias].engine
+    count = 0
+    for directory in engine.dirs:
+        for name in template_names(directory):
+            engine.get_template(name)
+            count += 1
+    return count
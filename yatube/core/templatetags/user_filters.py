@@ -1,4 +1,9 @@
 from django import template
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.search import HIGHLIGHT_END, HIGHLIGHT_START
 
 # В template.Library зарегистрированы все встроенные теги и фильтры шаблонов;
 # добавляем к ним и наш фильтр.
@@ -8,3 +13,23 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.filter
+def highlight(snippet):
+    """Экранирует сниппет поиска и выделяет найденные слова тегом <mark>."""
+    html = escape(snippet)
+    html = html.replace(HIGHLIGHT_START, '<mark>')
+    html = html.replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, cursor=None):
+    """Адрес страницы с курсором, остальные GET-параметры сохраняются."""
+    query = context['request'].GET.copy()
+    query.pop(settings.PAGE_NUMBER, None)
+    query.pop(settings.PAGE_CURSOR, None)
+    if cursor:
+        query[settings.PAGE_CURSOR] = cursor
+    return f'?{query.urlencode()}'
@@ -0,0 +1,45 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management.base import CommandError
+from django.db import connections
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase
+
+from core.management.commands.bench_urls import Command, named_routes
+
+
+class BenchUrlsTest(SimpleTestCase):
+    def test_named_routes_cover_apps(self):
+        """В замер попадают адреса всех трёх приложений."""
+        names = dict(named_routes())
+        self.assertEqual(names['posts:post_detail'], ['post_id'])
+        self.assertIn('users:signup', names)
+        self.assertIn('about:tech', names)
+
+    def test_compare_fails_on_regression(self):
+        """Рост p95 сверх допуска и лишние запросы — это регрессия."""
+        baseline = {'posts:index': {'p95_ms': 10.0, 'queries': 1}}
+        Command(stdout=StringIO()).compare(
+            {'posts:index': {'p95_ms': 12.0, 'queries': 1}}, baseline)
+        for result in ({'p95_ms': 20.0, 'queries': 1},
+                       {'p95_ms': 10.0, 'queries': 2}):
+            with self.subTest(result=result):
+                with self.assertRaises(CommandError):
+                    Command(stdout=StringIO()).compare(
+                        {'posts:index': result}, baseline)
+
+
+class TimedGetTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def test_counts_queries_on_every_database(self):
+        """Запросы к реплике тоже попадают в счётчик."""
+        def get(url):
+            for alias in self.databases:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            return HttpResponse()
+
+        _, queries, status = Command.timed_get(mock.Mock(get=get), '/')
+        self.assertEqual((queries, status), (2, 200))
@@ -0,0 +1,39 @@
+from datetime import date
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..context_processors import year
+from ..management.commands.bench_context_processors import (
+    EAGER_YEAR_PROCESSOR, YEAR_PROCESSOR, with_processor)
+
+
+class YearContextProcessorTest(SimpleTestCase):
+    def test_year_is_current(self):
+        self.assertEqual(year.year(None), {'year': date.today().year})
+
+    def test_year_recomputed_after_midnight(self):
+        """До полуночи дата не запрашивается, после - пересчитывается."""
+        with mock.patch.object(year, 'date') as fake_date:
+            year.current_year()
+            fake_date.today.assert_not_called()
+        expires = year._current[1]
+        with mock.patch.object(year.time, 'time', return_value=expires), \
+                mock.patch.object(year, '_year_until',
+                                  return_value=(2100, expires + 1)):
+            self.assertEqual(year.current_year(), 2100)
+        year._current = year._year_until()
+
+
+class BenchContextProcessorsTest(SimpleTestCase):
+    def test_with_processor_swaps_only_year(self):
+        templates = with_processor(
+            settings.TEMPLATES, YEAR_PROCESSOR, EAGER_YEAR_PROCESSOR)
+        before = settings.TEMPLATES[0]['OPTIONS']['context_processors']
+        after = templates[0]['OPTIONS']['context_processors']
+        self.assertEqual(
+            after,
+            [EAGER_YEAR_PROCESSOR if path == YEAR_PROCESSOR else path
+             for path in before])
+        self.assertIn(YEAR_PROCESSOR, before)
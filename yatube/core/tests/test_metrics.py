@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import Histogram, registry
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def setUp(self):
+        registry.reset()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_server_timing_header(self):
+        """Ответ содержит время БД, шаблонов и полное время."""
+        response = self.guest_client.get(reverse('about:author'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_views_aggregated_in_histograms(self):
+        for _ in range(3):
+            self.guest_client.get(reverse('posts:index'))
+        view = registry.snapshot()['posts:index']
+        self.assertEqual(view['total_ms']['count'], 3)
+        self.assertGreater(view['template_ms']['sum'], 0)
+        self.assertGreaterEqual(view['queries']['sum'], 0)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_measured(self):
+        response = self.guest_client.get(reverse('about:author'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(registry.snapshot(), {})
+
+    def test_metrics_page_is_staff_only(self):
+        self.guest_client.get(reverse('about:tech'))
+        response = self.guest_client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.staff_client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('about:tech', response.json()['views'])
+
+
+class HistogramTests(TestCase):
+    def test_quantiles_use_bucket_bounds(self):
+        histogram = Histogram((1, 10, 100))
+        for value in (0.5, 5, 5, 50, 500):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 10)
+        self.assertIsNone(histogram.quantile(1))
+        self.assertEqual(histogram.as_dict()['buckets']['>100'], 1)
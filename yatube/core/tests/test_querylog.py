@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, PostQuerySet
+
+from ..querylog import QueryBudgetExceeded, query_budget, shape
+
+User = get_user_model()
+
+
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text='Пост') for _ in range(5))
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_shape_ignores_in_list_length(self):
+        self.assertEqual(
+            shape('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            shape('SELECT 1 WHERE id IN (%s, %s)'))
+
+    def test_repeated_queries_are_logged_with_view(self):
+        """N+1 в шаблоне попадает в журнал с представлением и шаблоном."""
+        cache.clear()
+        with mock.patch.object(
+                PostQuerySet, 'for_feed', lambda queryset: queryset):
+            with self.assertLogs('core.querylog', 'WARNING') as logs:
+                with override_settings(DUPLICATE_QUERY_LIMIT=1):
+                    self.guest_client.get(reverse('posts:index'))
+        self.assertIn('posts:index (posts/index.html)', logs.output[0])
+
+    def test_budget_fails_on_n_plus_one(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(duplicates=1):
+                for post in Post.objects.all():
+                    post.author.username
+
+    def test_eager_loading_fits_budget(self):
+        with query_budget(budget=1, duplicates=1):
+            for post in Post.objects.select_related('author'):
+                post.author.username
+
+    @override_settings(QUERY_BUDGET=1, QUERY_BUDGET_STRICT=True)
+    def test_strict_budget_fails_request(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.guest_client.get(
+                reverse('posts:profile', kwargs={'username': 'author'}))
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_query_logged_with_template(self):
+        with self.assertLogs('core.querylog', 'WARNING') as logs:
+            self.guest_client.get(
+                reverse('posts:post_detail',
+                        kwargs={'post_id': Post.objects.first().pk}))
+        self.assertTrue(any(
+            'posts:post_detail' in line for line in logs.output))
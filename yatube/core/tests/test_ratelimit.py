@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from ..ratelimit import client_ip, rejected_counts, take
+
+User = get_user_model()
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_over_time(self):
+        keys = [('bucket', '2/m')]
+        self.assertEqual(take(keys, now=0), 0)
+        self.assertEqual(take(keys, now=0), 0)
+        self.assertAlmostEqual(take(keys, now=0), 30)
+        self.assertAlmostEqual(take(keys, now=20), 10)
+        self.assertEqual(take(keys, now=30), 0)
+
+    def test_rejection_keeps_other_buckets(self):
+        """Отказ по одной корзине не списывает токен из другой."""
+        take([('empty', '1/m')], now=0)
+        self.assertGreater(take([('full', '1/m'), ('empty', '1/m')], now=0), 0)
+        self.assertEqual(take([('full', '1/m')], now=0), 0)
+
+    def test_client_ip_from_trusted_header(self):
+        """За прокси IP берётся из последнего адреса заголовка."""
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.7')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            self.assertEqual(client_ip(request), '203.0.113.7')
+            del request.META['HTTP_X_FORWARDED_FOR']
+            self.assertEqual(client_ip(request), '10.0.0.1')
+
+
+@override_settings(RATE_LIMITS={'post_create': {'user': '2/m'}})
+class RateLimitViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_flood_gets_429_with_retry_after(self):
+        url = reverse('posts:post_create')
+        rejected = rejected_counts().get('post_create', 0)
+        for _ in range(2):
+            response = self.authorized_client.post(url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertContains(
+            response, '<title>Слишком много запросов</title>',
+            status_code=429)
+        self.assertEqual(rejected_counts()['post_create'], rejected + 1)
+        # Открыть форму можно и после исчерпания лимита
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.feed_cache import feed_cache_stats
+from posts.models import Post
+
+from ..routers import ReplicaRouter, current_replica
+
+User = get_user_model()
+
+
+PRIMARY_TEXT = 'Пост из основной базы'
+REPLICA_TEXT = 'Пост из реплики'
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    # replica - отдельная база с другими данными: по тексту поста видно,
+    # из какой базы прочитана страница. Сигналы постов пишут в default,
+    # поэтому каждая база заполняется отдельно и без TestCase-транзакций
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Роутер не пускает миграции в реплику: при создании тестовой
+        # базы они лишь отмечены применёнными. В бою схему приносит
+        # репликация, здесь накатываем её заново без роутера
+        MigrationRecorder(connections['replica']).flush()
+        with override_settings(DATABASE_ROUTERS=[]):
+            call_command('migrate', database='replica', verbosity=0)
+
+    def setUp(self):
+        cache.clear()
+        # flush между тестами обходит базы, куда роутер не пускает
+        # миграции, поэтому реплику чистим сами
+        with connections['replica'].cursor() as cursor:
+            for model in (Post, User):
+                cursor.execute(f'DELETE FROM {model._meta.db_table}')
+        self.user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.user, text=PRIMARY_TEXT)
+        # В реплике тот же пост с другим текстом; bulk_create не шлёт
+        # сигналов, которые записали бы счётчики в default
+        User.objects.using('replica').bulk_create([
+            User(pk=self.user.pk, username=self.user.username)])
+        Post.objects.using('replica').bulk_create([
+            Post(pk=self.post.pk, author_id=self.user.pk, text=REPLICA_TEXT,
+                 pub_date=self.post.pub_date)])
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_router_defaults_to_primary(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Post))
+        token = current_replica.set('replica')
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_write(Post), 'default')
+        finally:
+            current_replica.reset(token)
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+    def test_read_views_use_replica(self):
+        """Ленты и страница поста читают только из реплики."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                primary, replica = self.get(Client(), url)
+                self.assertEqual(primary, 0)
+                self.assertGreater(replica, 0)
+
+    def test_read_views_show_replica_data(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            # Потоковые ответы API читают базу уже после представления
+            reverse('posts:api_post_list'),
+            reverse('posts:api_profile_posts', args=[self.user.username]),
+            reverse('posts:api_post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertContains(response, REPLICA_TEXT)
+                self.assertNotContains(response, PRIMARY_TEXT)
+
+    def test_lagging_replica_page_is_not_cached(self):
+        """Сразу после записи страница из реплики не кешируется
+        и не получает ETag новой версии ленты."""
+        # Пост из setUp только что сдвинул версии лент
+        client = Client()
+        url = reverse('posts:index')
+        self.assertFalse(client.get(url).has_header('ETag'))
+        hits = feed_cache_stats()['hits']
+        client.get(url)
+        self.assertEqual(feed_cache_stats()['hits'], hits)
+        # Через REPLICA_STICKY_SECONDS отметки об изменениях истекают
+        cache.clear()
+        self.assertTrue(client.get(url).has_header('ETag'))
+        client.get(url)
+        self.assertEqual(feed_cache_stats()['hits'], hits + 1)
+
+    def test_writer_sticks_to_primary(self):
+        """После создания поста автор читает из основной базы."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'})
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        primary, replica = self.get(
+            self.authorized_client, reverse('posts:index'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, PRIMARY_TEXT)
+        self.assertNotContains(response, REPLICA_TEXT)
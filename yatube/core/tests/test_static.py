@@ -0,0 +1,98 @@
+import gzip
+import shutil
+import tempfile
+
+import brotli
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.functional import empty
+
+from ..middleware import StaticFilesMiddleware, accepted_encodings
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+    SERVE_STATIC=True,
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        staticfiles_storage._wrapped = empty
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        cls.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse(status=404))
+
+    @classmethod
+    def tearDownClass(cls):
+        staticfiles_storage._wrapped = empty
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name, **headers):
+        request = RequestFactory().get(settings.STATIC_URL + name, **headers)
+        return self.middleware(request)
+
+    def test_collectstatic_writes_hashed_gzip_variants(self):
+        self.assertNotEqual(self.css, 'css/bootstrap.min.css')
+        with staticfiles_storage.open(self.css) as original, \
+                staticfiles_storage.open(self.css + '.gz') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()),
+                             original.read())
+        with staticfiles_storage.open(self.css) as original, \
+                staticfiles_storage.open(self.css + '.br') as compressed:
+            self.assertEqual(brotli.decompress(compressed.read()),
+                             original.read())
+        # PNG не сжимается повторно
+        logo = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(staticfiles_storage.exists(logo + '.gz'))
+
+    def test_hashed_asset_is_immutable_and_precompressed(self):
+        response = self.get(self.css, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open(self.css) as original:
+            self.assertEqual(body, original.read())
+
+    def test_plain_name_and_encoding_fallbacks(self):
+        response = self.get(self.css)
+        self.assertNotIn('Content-Encoding', response)
+        response.close()
+        response = self.get('css/bootstrap.min.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+        self.assertEqual(self.get('css/missing.css').status_code, 404)
+
+    def test_encoding_follows_accept_encoding_weights(self):
+        cases = (
+            ('gzip, deflate, br', 'br'),
+            ('br;q=0, gzip', 'gzip'),
+            ('gzip;q=1.0, br;q=0.5', 'gzip'),
+            ('*', 'br'),
+            ('*;q=0.1, br;q=0', 'gzip'),
+            ('br;q=0, gzip;q=0', None),
+            ('brotli, x-gzip', 'gzip'),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                response = self.get(self.css, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.get('Content-Encoding'), expected)
+                response.close()
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    def test_weights(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.8, BR, identity ; q=0, x;q=bad'),
+            {'gzip': 0.8, 'br': 1.0, 'identity': 0.0, 'x': 0.0})
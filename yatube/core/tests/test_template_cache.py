@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..template_cache import (CACHED_LOADERS, template_names, warm_templates,
+                              with_loaders)
+
+
+@override_settings(
+    TEMPLATES=with_loaders(settings.TEMPLATES, CACHED_LOADERS))
+class WarmTemplatesTest(SimpleTestCase):
+    def test_warm_up_compiles_every_project_template(self):
+        """Прогрев кладёт в кеш загрузчика все шаблоны из templates/."""
+        names = set(template_names(settings.TEMPLATES_DIR))
+        self.assertIn('posts/paginator.html', names)
+        self.assertIn('includes/header.html', names)
+        self.assertEqual(warm_templates(), len(names))
+        loader = engines['django'].engine.template_loaders[0]
+        cached = {key.split('-')[0] for key in loader.get_template_cache}
+        self.assertTrue(names <= cached)
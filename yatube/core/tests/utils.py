@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет on_commit-колбэки, зарегистрированные внутри блока.
+
+    TestCase держит тест в транзакции, которая не коммитится, поэтому
+    колбэки сами не сработают (аналог captureOnCommitCallbacks
+    из новых версий Django).
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    while len(connection.run_on_commit) > start:
+        _, callback = connection.run_on_commit.pop(start)
+        callback()
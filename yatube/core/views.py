@@ -1,7 +1,66 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from posts.feed_cache import feed_cache_stats
+from posts.thumbnails import original_name
+
+from .metrics import registry
+from .ratelimit import rejected_counts
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
     # выводить её в шаблон пользовательской страницы 404 мы не станем
     return render(request, 'core/404.html', {'path': request.path}, status=404)
+
+
+@staff_member_required
+def metrics(request):
+    """Гистограммы запросов по представлениям в этом процессе."""
+    return JsonResponse({
+        'views': registry.snapshot(),
+        'feed_cache': feed_cache_stats(),
+        'rate_limit_rejected': rejected_counts(),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def media(request, path):
+    """Отдаёт загруженный файл без копирования в память процесса.
+
+    FileResponse передаёт файл серверу через wsgi.file_wrapper
+    (sendfile), а при MEDIA_ACCEL_REDIRECT отдачу берёт на себя
+    nginx. Миниатюра, которую ещё не успели создать, заменяется
+    исходной картинкой.
+    """
+    try:
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    cache_control = 'public, max-age=31536000, immutable'
+    if not os.path.isfile(full_path):
+        original = original_name(path)
+        if original is None:
+            raise Http404
+        path = original
+        full_path = default_storage.path(path)
+        if not os.path.isfile(full_path):
+            raise Http404
+        # Миниатюра скоро появится, запасной ответ не кешируем надолго
+        cache_control = 'public, max-age=60'
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT + path
+    else:
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type)
+    response['Cache-Control'] = cache_control
+    return response
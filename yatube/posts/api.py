@@ -0,0 +1,300 @@
+"""JSON API только для чтения: посты, группы и профили авторов.
+
+Списки листаются курсором по (pub_date, id), ``?fields=`` выбирает
+только нужные поля (и только их колонки из базы), ``?ids=`` отдаёт
+несколько постов одним запросом. Страницы сериализуются потоком,
+запись за записью.
+"""
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_safe
+
+from core.paginator import KeysetPage, KeysetPaginator
+from core.routers import read_replica
+
+from .feed_cache import INDEX_FEED, author_feed, feed_etag, group_feed
+from .models import Group, Post, User
+from .views import post_etag
+
+CONTENT_TYPE = 'application/json; charset=utf-8'
+POST_ORDERING = ('-pub_date', '-pk')
+GROUP_ORDERING = ('title', 'pk')
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def _full_name(user):
+    return user.get_full_name()
+
+
+def _counter(name):
+    def get(user):
+        # У автора без постов строки счётчика ещё нет
+        counter = getattr(user, 'post_counter', None)
+        return getattr(counter, name, 0)
+    return get
+
+
+# Поле ответа: (колонки модели, которые нужно выбрать; значение)
+POST_FIELDS = {
+    'id': ((), lambda post: post.pk),
+    'text': (('text',), lambda post: post.text),
+    'pub_date': (('pub_date',), lambda post: _date(post.pub_date)),
+    'updated': (('updated',), lambda post: _date(post.updated)),
+    'author': (('author__username',), lambda post: post.author.username),
+    'author_name': (
+        ('author__first_name', 'author__last_name'),
+        lambda post: _full_name(post.author),
+    ),
+    'group': (
+        ('group__slug',),
+        lambda post: post.group.slug if post.group else None,
+    ),
+    'group_title': (
+        ('group__title',),
+        lambda post: post.group.title if post.group else None,
+    ),
+    'image': (
+        ('image',), lambda post: post.image.url if post.image else None),
+    'image_width': (('image_width',), lambda post: post.image_width),
+    'image_height': (('image_height',), lambda post: post.image_height),
+    'thumbnails': (
+        ('image', 'image_width', 'image_height'),
+        lambda post: [
+            {'url': url, 'width': width, 'height': height}
+            for url, width, height in post.thumbnails()
+        ],
+    ),
+}
+GROUP_FIELDS = {
+    'id': ((), lambda group: group.pk),
+    'slug': (('slug',), lambda group: group.slug),
+    'title': (('title',), lambda group: group.title),
+    'description': (('description',), lambda group: group.description),
+    'posts_count': (('posts_count',), lambda group: group.posts_count),
+}
+PROFILE_FIELDS = {
+    'id': ((), lambda user: user.pk),
+    'username': (('username',), lambda user: user.username),
+    'name': (('first_name', 'last_name'), _full_name),
+    'posts_count': (
+        ('post_counter__posts_count',), _counter('posts_count')),
+    'followers_count': (
+        ('post_counter__followers_count',), _counter('followers_count')),
+}
+
+
+def parse_fields(value, available):
+    """Имена запрошенных полей в порядке запроса; пусто - все поля."""
+    if not value:
+        return list(available)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ValueError(f'Неизвестные поля: {", ".join(unknown)}')
+    return list(dict.fromkeys(names))
+
+
+def parse_ids(value):
+    if value is None:
+        return None
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValueError(f'Неверный список id: {value}')
+    if not ids or len(ids) > settings.API_MAX_IDS:
+        raise ValueError(f'Нужно от 1 до {settings.API_MAX_IDS} id')
+    return list(dict.fromkeys(ids))
+
+
+def parse_limit(value):
+    if value is None:
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+        raise ValueError(
+            f'limit должен быть от 1 до {settings.API_MAX_PAGE_SIZE}')
+    return limit
+
+
+def select_fields(queryset, spec, names, ordering=()):
+    """Ограничивает выборку колонками запрошенных полей и полей
+    сортировки; связанные модели присоединяются, только если нужны."""
+    columns = {
+        column for name in names for column in spec[name][0]
+    } | {name.lstrip('-') for name in ordering if name.lstrip('-') != 'pk'}
+    relations = {column.split('__')[0] for column in columns
+                 if '__' in column}
+    if relations:
+        # select_related() без аргументов присоединил бы все связи
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*(columns or {'pk'}))
+
+
+def serializer(spec, names):
+    getters = [(name, spec[name][1]) for name in names]
+    return lambda obj: {name: get(obj) for name, get in getters}
+
+
+def dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def api_error(message, status=HTTPStatus.BAD_REQUEST):
+    return JsonResponse(
+        {'detail': message}, status=status,
+        json_dumps_params={'ensure_ascii': False})
+
+
+def api_response(data):
+    return JsonResponse(
+        data, json_dumps_params={'ensure_ascii': False}, safe=False)
+
+
+def stream_page(paginator, cursor, serialize):
+    """Генератор JSON страницы: записи уходят клиенту по мере чтения
+    из базы, курсоры соседних страниц - в конце ответа."""
+    queryset, forward, values = paginator.cursor_queryset(cursor)
+    per_page = paginator.per_page
+    rows = queryset[:per_page + 1].iterator()
+    has_more = False
+    if not forward:
+        # Назад база читает в обратном порядке: страницу приходится
+        # собрать, чтобы развернуть
+        rows = list(rows)
+        has_more = len(rows) > per_page
+        rows = reversed(rows[:per_page])
+    yield '{"results":['
+    first = last = None
+    for count, obj in enumerate(rows):
+        if count == per_page:
+            has_more = True
+            break
+        yield ('' if first is None else ',') + dumps(serialize(obj))
+        first = first or obj
+        last = obj
+    bounds = [obj for obj in (first, last) if obj is not None]
+    if forward:
+        page = KeysetPage(bounds, None, paginator, has_next=has_more,
+                          has_previous=values is not None)
+    else:
+        page = KeysetPage(bounds, None, paginator,
+                          has_next=values is not None, has_previous=has_more)
+    yield '],"next":{},"previous":{}}}'.format(
+        dumps(page.next_cursor), dumps(page.previous_cursor))
+
+
+def list_response(request, queryset, spec, ordering):
+    try:
+        names = parse_fields(request.GET.get('fields'), spec)
+        limit = parse_limit(request.GET.get('limit'))
+    except ValueError as error:
+        return api_error(str(error))
+    # Генератор читает базу уже после выхода из read_replica: база
+    # выбирается роутером сейчас и закрепляется за выборкой
+    queryset = queryset.using(queryset.db)
+    paginator = KeysetPaginator(
+        select_fields(queryset, spec, names, ordering), limit, ordering)
+    return StreamingHttpResponse(
+        stream_page(paginator, request.GET.get(settings.PAGE_CURSOR),
+                    serializer(spec, names)),
+        content_type=CONTENT_TYPE)
+
+
+def posts_response(request, queryset):
+    """Страница постов или, с ``?ids=``, посты с этими id в порядке
+    запроса; неизвестные id пропускаются."""
+    try:
+        ids = parse_ids(request.GET.get('ids'))
+        names = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    except ValueError as error:
+        return api_error(str(error))
+    if ids is None:
+        return list_response(request, queryset, POST_FIELDS, POST_ORDERING)
+    posts = select_fields(queryset, POST_FIELDS, names).in_bulk(ids)
+    serialize = serializer(POST_FIELDS, names)
+    return api_response({
+        'results': [serialize(posts[pk]) for pk in ids if pk in posts],
+    })
+
+
+def detail_response(request, queryset, spec, **lookup):
+    try:
+        names = parse_fields(request.GET.get('fields'), spec)
+    except ValueError as error:
+        return api_error(str(error))
+    obj = select_fields(queryset, spec, names).filter(**lookup).first()
+    if obj is None:
+        return api_error('Не найдено', HTTPStatus.NOT_FOUND)
+    return api_response(serializer(spec, names)(obj))
+
+
+@read_replica
+@require_safe
+@condition(etag_func=feed_etag(lambda: INDEX_FEED))
+def post_list(request):
+    return posts_response(request, Post.objects.all())
+
+
+@read_replica
+@require_safe
+@condition(etag_func=post_etag)
+def post_detail(request, post_id):
+    return detail_response(request, Post.objects.all(), POST_FIELDS,
+                           pk=post_id)
+
+
+# Число постов групп меняется с каждым постом, поэтому список групп
+# устаревает вместе с главной лентой
+@read_replica
+@require_safe
+@condition(etag_func=feed_etag(lambda: INDEX_FEED))
+def group_list(request):
+    return list_response(
+        request, Group.objects.all(), GROUP_FIELDS, GROUP_ORDERING)
+
+
+@read_replica
+@require_safe
+@condition(etag_func=feed_etag(group_feed))
+def group_detail(request, slug):
+    return detail_response(request, Group.objects.all(), GROUP_FIELDS,
+                           slug=slug)
+
+
+@read_replica
+@require_safe
+@condition(etag_func=feed_etag(group_feed))
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return api_error('Не найдено', HTTPStatus.NOT_FOUND)
+    return posts_response(request, Post.objects.filter(group_id=group_id))
+
+
+# Без ETag: число подписчиков меняется без смены версии ленты автора
+@read_replica
+@require_safe
+def profile(request, username):
+    return detail_response(request, User.objects.all(), PROFILE_FIELDS,
+                           username=username)
+
+
+@read_replica
+@require_safe
+@condition(etag_func=feed_etag(author_feed))
+def profile_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return api_error('Не найдено', HTTPStatus.NOT_FOUND)
+    return posts_response(request, Post.objects.filter(author_id=author_id))
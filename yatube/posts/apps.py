@@ -1,5 +1,19 @@
 from django.apps import AppConfig
+from django.db import connections, router
+from django.db.models.signals import post_migrate
+
+
+def restore_search_index(sender, using, **kwargs):
+    from .search import install_search_index
+    # В базы, куда роутер не пускает миграции (реплики), таблиц постов
+    # не накатывают - индексу не к чему крепиться
+    if router.allow_migrate_model(using, sender.get_model('Post')):
+        install_search_index(connections[using])
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(restore_search_index, sender=self)
@@ -0,0 +1,57 @@
+import random
+
+from django.db import transaction
+from faker import Faker
+
+from .models import Group, Post, User
+
+BATCH_SIZE = 10000
+PREFIX = 'bench'
+VOCABULARY_SIZE = 500
+
+
+def _vocabulary(rng):
+    """Слова для текстов постов с убывающей частотой, как в живом языке."""
+    fake = Faker('ru_RU')
+    fake.seed_instance(rng.random())
+    words = fake.words(nb=VOCABULARY_SIZE, unique=True)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return words, weights
+
+
+def seed(posts, authors, groups, stdout):
+    """Досеивает базу до нужного числа пользователей, групп и постов.
+
+    Уже созданные записи не трогаются, поэтому повторный запуск на том
+    же файле базы только добавляет недостающее.
+    """
+    rng = random.Random(posts)
+    words, weights = _vocabulary(rng)
+    existing = User.objects.filter(username__startswith=PREFIX).count()
+    User.objects.bulk_create(
+        User(username=f'{PREFIX}_{number}')
+        for number in range(existing, authors)
+    )
+    existing = Group.objects.filter(slug__startswith=PREFIX).count()
+    Group.objects.bulk_create(
+        Group(title=f'Bench {number}', slug=f'{PREFIX}-{number}',
+              description='')
+        for number in range(existing, groups)
+    )
+    author_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    created = Post.objects.count()
+    while created < posts:
+        size = min(BATCH_SIZE, posts - created)
+        with transaction.atomic():
+            Post.objects.bulk_create(
+                Post(
+                    text=' '.join(rng.choices(
+                        words, weights, k=rng.randint(8, 40))),
+                    author_id=rng.choice(author_ids),
+                    group_id=rng.choice(group_ids),
+                )
+                for _ in range(size)
+            )
+        created += size
+        stdout.write(f'Постов: {created}/{posts}')
@@ -0,0 +1,50 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorCounter, Follow, Group, Post
+
+
+def change_author_count(author_id, delta):
+    """Сдвигает счётчик постов автора, создавая его при первом посте."""
+    updated = AuthorCounter.objects.filter(author_id=author_id).update(
+        posts_count=F('posts_count') + delta)
+    if not updated and delta > 0:
+        AuthorCounter.objects.create(author_id=author_id, posts_count=delta)
+
+
+def change_follower_count(author_id, delta):
+    """Сдвигает счётчик подписчиков автора."""
+    updated = AuthorCounter.objects.filter(author_id=author_id).update(
+        followers_count=F('followers_count') + delta)
+    if not updated and delta > 0:
+        AuthorCounter.objects.create(
+            author_id=author_id, followers_count=delta)
+
+
+def change_group_count(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta)
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики по таблице постов."""
+    group_counts = Post.objects.filter(group=OuterRef('pk')).order_by()
+    group_counts = group_counts.values('group').annotate(
+        total=Count('pk')).values('total')
+    Group.objects.update(
+        posts_count=Coalesce(Subquery(group_counts), 0))
+    AuthorCounter.objects.all().delete()
+    counters = {}
+    author_counts = Post.objects.order_by().values('author').annotate(
+        total=Count('pk'))
+    for row in author_counts.iterator():
+        counters[row['author']] = AuthorCounter(
+            author_id=row['author'], posts_count=row['total'])
+    follower_counts = Follow.objects.order_by().values('author').annotate(
+        total=Count('pk'))
+    for row in follower_counts.iterator():
+        counter = counters.setdefault(
+            row['author'], AuthorCounter(author_id=row['author']))
+        counter.followers_count = row['total']
+    AuthorCounter.objects.bulk_create(counters.values())
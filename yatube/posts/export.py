@@ -0,0 +1,83 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils.dateparse import parse_date
+from django.utils.timezone import make_aware
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+COLUMNS = (
+    ('id', 'pk'),
+    ('text', 'text'),
+    ('pub_date', 'pub_date'),
+    ('updated', 'updated'),
+    ('author', 'author__username'),
+    ('group', 'group__slug'),
+    ('group_title', 'group__title'),
+)
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def parse_filters(author=None, group=None, since=None, until=None):
+    """Проверяет фильтры выгрузки; даты ожидаются в формате ГГГГ-ММ-ДД."""
+    filters = {}
+    if author:
+        filters['author__username'] = author
+    if group:
+        filters['group__slug'] = group
+    # Границы - моменты начала суток в текущем часовом поясе: сравнение
+    # pub_date с ними идёт по индексу, а pub_date__date - нет
+    if since:
+        filters['pub_date__gte'] = day_start(since)
+    if until:
+        filters['pub_date__lt'] = day_start(until, days=1)
+    return filters
+
+
+def day_start(value, days=0):
+    """Начало дня value (плюс days дней) в текущем часовом поясе."""
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'Неверная дата: {value}')
+    return make_aware(datetime.combine(day + timedelta(days=days), time.min))
+
+
+def export_rows(fmt, filters, chunk_size=CHUNK_SIZE):
+    """Генератор строк выгрузки постов в формате JSONL или CSV.
+
+    Посты читаются кусками по chunk_size в порядке первичного ключа
+    вместе с автором и группой, поэтому память не растёт с размером
+    таблицы.
+    """
+    names = [name for name, _ in COLUMNS]
+    rows = Post.objects.filter(**filters).order_by('pk').values_list(
+        *(field for _, field in COLUMNS)).iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow(_serialize(row))
+        return
+    for row in rows:
+        yield json.dumps(
+            dict(zip(names, _serialize(row))), ensure_ascii=False) + '\n'
+
+
+def _serialize(row):
+    return [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in row
+    ]
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.routers import current_replica
+
+# Лента групп входит в ключ каждой страницы: название и адрес группы
+# выводятся во всех лентах, а меняются редко
+GROUPS_FEED = 'groups'
+INDEX_FEED = 'index'
+
+VERSION_KEY = 'feed-version:{}'
+PAGE_KEY = 'feed-page:{}'
+CHANGED_KEY = 'feed-changed:{}'
+
+# Попадания и промахи считаются в памяти процесса: запись счётчика
+# в общий кеш на каждое попадание стоила бы столько же, сколько само
+# чтение страницы
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def get_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def group_feed(slug):
+    return f'group:{slug}'
+
+
+def author_feed(username):
+    # Имена пользователей могут содержать пробелы, недопустимые в ключах
+    return f'author:{quote(username)}'
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def version_key(feed):
+    # memcached ограничивает ключ 250 байтами, а имя автора в имени
+    # ленты может быть длинным
+    return VERSION_KEY.format(_digest(feed))
+
+
+def _initial_version():
+    # Начальная версия от времени не совпадёт с версией, под которой
+    # страница лежала в кеше до вытеснения ключа версии
+    return int(time.time() * 1000)
+
+
+def feed_versions(feeds):
+    cache = get_cache()
+    keys = [version_key(feed) for feed in feeds]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_feeds(*feeds):
+    """Сдвигает версии лент: все их закешированные страницы устаревают."""
+    cache = get_cache()
+    for feed in set(feeds):
+        key = version_key(feed)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+    if settings.DATABASE_REPLICAS:
+        cache.set_many(
+            {CHANGED_KEY.format(_digest(feed)): True for feed in feeds},
+            settings.REPLICA_STICKY_SECONDS)
+
+
+def replica_may_lag(feeds):
+    """Запрос читает из реплики, а ленты менялись недавно.
+
+    Запись считается дошедшей до реплик через REPLICA_STICKY_SECONDS,
+    на том же допущении держится кука REPLICA_STICKY_COOKIE. До этого
+    страница из реплики может не содержать изменений, и класть её
+    в кеш или отдавать с ETag новой версии нельзя: устаревшая копия
+    жила бы до следующего изменения ленты.
+    """
+    if current_replica.get() is None:
+        return False
+    return bool(get_cache().get_many(
+        [CHANGED_KEY.format(_digest(feed)) for feed in feeds]))
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def feed_cache_stats():
+    """Счётчики попаданий и промахов кеша лент с запуска процесса."""
+    with _lock:
+        return {name: _stats[name] for name in ('hits', 'misses')}
+
+
+def page_key(feeds, request):
+    versions = ':'.join(
+        f'{feed}={version}'
+        for feed, version in zip(feeds, feed_versions(feeds))
+    )
+    return PAGE_KEY.format(
+        _digest(f'{versions}:{request.get_full_path()}'))
+
+
+def make_etag(request, *parts):
+    """ETag страницы: зависит от адреса, пользователя и версий данных."""
+    raw = ':'.join(
+        str(part) for part in (request.get_full_path(), request.user.pk,
+                               *parts)
+    )
+    return _digest(raw)
+
+
+def feed_etag(feed_name):
+    """Функция ETag для condition(): страница ленты не изменилась,
+    пока не сдвинулись версии её ленты и групп."""
+    def etag(request, *args, **kwargs):
+        feeds = (feed_name(**kwargs), GROUPS_FEED)
+        if replica_may_lag(feeds):
+            return None
+        return make_etag(request, *feed_versions(feeds))
+    return etag
+
+
+def cache_feed(feed_name, timeout=None):
+    """Кеширует отрендеренные страницы ленты для анонимных читателей.
+
+    feed_name получает аргументы адреса и возвращает имя ленты.
+    Ключ страницы включает версию ленты, поэтому сигналы постов и групп
+    сбрасывают только затронутые ленты. timeout по умолчанию -
+    FEED_CACHE_TIMEOUT.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            cache = get_cache()
+            feeds = (feed_name(**kwargs), GROUPS_FEED)
+            key = page_key(feeds, request)
+            response = cache.get(key)
+            if response is not None:
+                _count('hits')
+                return response
+            _count('misses')
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200
+                    and not replica_may_lag(feeds)):
+                cache.set(key, response,
+                          timeout or settings.FEED_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
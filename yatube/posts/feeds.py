@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from core.routers import read_replica
+
+from .feed_cache import (INDEX_FEED, author_feed, cache_feed, feed_etag,
+                         group_feed)
+from .models import Group, Post, User
+
+TITLE_LENGTH = 60
+
+
+class PostsFeed(Feed):
+    """Общая часть лент RSS: записи выбираются тем же запросом,
+    что и страницы сайта, автор и группа приходят одним JOIN."""
+
+    def posts(self, obj):
+        return Post.objects.for_feed()
+
+    def items(self, obj):
+        return self.posts(obj).order_by(
+            '-pub_date', '-pk')[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(TITLE_LENGTH)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_author_link(self, item):
+        return reverse(
+            'posts:profile', kwargs={'username': item.author.username})
+
+    def item_categories(self, item):
+        return (item.group.title,) if item.group else ()
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class LatestPostsFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def description(self, obj):
+        return 'Последние обновления на сайте'
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, obj):
+        return obj.posts.for_feed()
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def description(self, obj):
+        return obj.description
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def posts(self, obj):
+        return obj.posts.for_feed()
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+
+class LatestPostsAtomFeed(AtomMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomMixin, AuthorPostsFeed):
+    pass
+
+
+def feed_view(feed, feed_name):
+    """Лента с теми же ETag и кешем, что и её страница на сайте:
+    готовый XML лежит в кеше, пока не изменится версия ленты."""
+    view = cache_feed(
+        feed_name, timeout=settings.SYNDICATION_CACHE_TIMEOUT)(feed)
+    view = condition(etag_func=feed_etag(feed_name))(view)
+    return read_replica(view)
+
+
+index_rss = feed_view(LatestPostsFeed(), lambda: INDEX_FEED)
+index_atom = feed_view(LatestPostsAtomFeed(), lambda: INDEX_FEED)
+group_rss = feed_view(GroupPostsFeed(), group_feed)
+group_atom = feed_view(GroupPostsAtomFeed(), group_feed)
+profile_rss = feed_view(AuthorPostsFeed(), author_feed)
+profile_atom = feed_view(AuthorPostsAtomFeed(), author_feed)
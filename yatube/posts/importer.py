@@ -0,0 +1,209 @@
+import csv
+import json
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Max, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .counters import change_author_count, change_group_count
+from .feed_cache import GROUPS_FEED, INDEX_FEED, invalidate_feeds
+from .models import Group, Post, User
+from .slugs import SlugAllocator
+from .timeline import fan_out_range
+
+BATCH_SIZE = 5000
+# Постов на один UPDATE дат: 4 параметра на пост, SQLite старше 3.32
+# принимает не больше 999 параметров
+DATES_CHUNK = 200
+
+
+def read_rows(stream, fmt):
+    """Построчно читает JSONL или CSV, не загружая файл целиком.
+
+    Битая строка JSONL - ValueError с её номером.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f'Строка {number}: неверный JSON ({error.msg})')
+
+
+def _dates_case(posts, dates):
+    return Case(
+        *(When(pk=post.pk, then=Value(date, output_field=DateTimeField()))
+          for post, date in zip(posts, dates)),
+        output_field=DateTimeField(),
+    )
+
+
+def _group_title(row):
+    return row.get('group_title') or row.get('group') or ''
+
+
+class PostImporter:
+    """Пакетный импорт постов через bulk_create.
+
+    Авторы и группы ищутся по словарям, которые пополняются одним
+    запросом на пакет; недостающие группы создаются. Каждый пакет
+    вставляется в своей транзакции вместе со сдвигом счётчиков
+    и рассылкой постов по лентам подписчиков.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, create_groups=True):
+        self.batch_size = batch_size
+        self.create_groups = create_groups
+        self.authors = {}
+        self.groups = {}
+        self.group_titles = {}
+        self.slugs = SlugAllocator(Group.objects)
+        self.imported = 0
+        self.skipped = 0
+
+    def run(self, rows, report=None):
+        started = time.perf_counter()
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+                if report:
+                    report(self.imported, time.perf_counter() - started)
+        if batch:
+            self.import_batch(batch)
+        if self.imported:
+            invalidate_feeds(INDEX_FEED, GROUPS_FEED)
+        return time.perf_counter() - started
+
+    def import_batch(self, rows):
+        self.resolve_authors({row.get('author') for row in rows})
+        with transaction.atomic():
+            self.resolve_groups(rows)
+            posts = [post for post in map(self.build_post, rows) if post]
+            self.insert(posts)
+            self.count(posts)
+            if posts:
+                pks = [post.pk for post in posts]
+                fan_out_range(min(pks), max(pks))
+        self.imported += len(posts)
+        self.skipped += len(rows) - len(posts)
+
+    def resolve_authors(self, usernames):
+        missing = {name for name in usernames if name} - self.authors.keys()
+        if missing:
+            self.authors.update(User.objects.filter(
+                username__in=missing).values_list('username', 'pk'))
+
+    def insert(self, posts):
+        """Вставляет посты, сохраняя даты источника.
+
+        bulk_create проставляет полям auto_now текущее время, поэтому
+        даты источника возвращаются UPDATE по id новых постов.
+        """
+        dates = [(post.pub_date, post.updated) for post in posts]
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        Post.objects.bulk_create(posts)
+        if posts and posts[0].pk is None:
+            # SQLite не возвращает id вставленных строк; в транзакции
+            # новые посты - это строки после прежнего максимума,
+            # в порядке вставки
+            pks = Post.objects.filter(pk__gt=last_pk).order_by(
+                'pk').values_list('pk', flat=True)
+            for post, pk in zip(posts, pks):
+                post.pk = pk
+        for start in range(0, len(posts), DATES_CHUNK):
+            chunk = posts[start:start + DATES_CHUNK]
+            pub_dates, updated = zip(*dates[start:start + DATES_CHUNK])
+            Post.objects.filter(
+                pk__range=(chunk[0].pk, chunk[-1].pk)).update(
+                pub_date=_dates_case(chunk, pub_dates),
+                updated=_dates_case(chunk, updated))
+        for post, (pub_date, updated) in zip(posts, dates):
+            post.pub_date, post.updated = pub_date, updated
+
+    def resolve_groups(self, rows):
+        """Проставляет строкам id группы: по адресу, затем по названию.
+
+        Недостающие группы создаются одним bulk_create на пакет, адреса
+        для них выдаёт общий на весь импорт SlugAllocator.
+        """
+        self._lookup_groups(rows)
+        if self.create_groups:
+            self._create_groups(rows)
+        for row in rows:
+            row['group_id'] = self._group_id(row)
+
+    def _lookup_groups(self, rows):
+        """Дочитывает одним запросом группы пакета, которых ещё нет
+        в словарях."""
+        slugs, titles = set(), set()
+        for row in rows:
+            slug = row.get('group') or ''
+            title = _group_title(row)
+            if slug and slug not in self.groups:
+                slugs.add(slug)
+            if title and title not in self.group_titles:
+                titles.add(title)
+        if slugs or titles:
+            self._remember(Group.objects.filter(
+                Q(slug__in=slugs) | Q(title__in=titles)))
+
+    def _create_groups(self, rows):
+        new_groups, new_slugs = {}, set()
+        for row in rows:
+            slug = row.get('group') or ''
+            title = _group_title(row)
+            if not title or title in new_groups or slug in new_slugs:
+                continue
+            if self._group_id(row) is not None:
+                continue
+            slug = slug or self.slugs.allocate(title)
+            new_slugs.add(slug)
+            new_groups[title] = Group(title=title, slug=slug, description='')
+        if new_groups:
+            Group.objects.bulk_create(new_groups.values())
+            self._remember(Group.objects.filter(title__in=new_groups))
+
+    def _remember(self, groups):
+        for slug, title, pk in groups.values_list('slug', 'title', 'pk'):
+            self.groups[slug] = pk
+            self.group_titles[title] = pk
+
+    def _group_id(self, row):
+        group_id = self.groups.get(row.get('group'))
+        if group_id is None:
+            group_id = self.group_titles.get(_group_title(row))
+        return group_id
+
+    def build_post(self, row):
+        author_id = self.authors.get(row.get('author'))
+        text = row.get('text')
+        if author_id is None or not text:
+            return None
+        pub_date = parse_datetime(row.get('pub_date') or '') or timezone.now()
+        updated = parse_datetime(row.get('updated') or '') or pub_date
+        return Post(
+            text=text,
+            author_id=author_id,
+            group_id=row.get('group_id'),
+            pub_date=pub_date,
+            updated=updated,
+        )
+
+    def count(self, posts):
+        """Сдвигает счётчики: bulk_create не посылает сигналы."""
+        authors = Counter(post.author_id for post in posts)
+        groups = Counter(post.group_id for post in posts if post.group_id)
+        for author_id, delta in authors.items():
+            change_author_count(author_id, delta)
+        for group_id, delta in groups.items():
+            change_group_count(group_id, delta)
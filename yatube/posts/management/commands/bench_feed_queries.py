@@ -0,0 +1,71 @@
+import os
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmark import benchmark_database, explain, measure
+from core.paginator import NEXT, KeysetPaginator
+from posts.benchmark import seed
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Засеивает отдельную базу SQLite постами и показывает планы '
+            'и время запросов главной, группы и профиля')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=5000)
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--db-file',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров; засеянные данные переиспользуются')
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['db_file']):
+            seed(options['posts'], options['authors'], options['groups'],
+                 self.stdout)
+            latest = Post.objects.exclude(group=None).first()
+            group = Group.objects.get(pk=latest.group_id)
+            author = User.objects.get(pk=latest.author_id)
+            feeds = (
+                ('index', Post.objects.for_feed()),
+                ('group', Post.objects.for_feed().filter(group=group)),
+                ('profile', Post.objects.for_feed().filter(author=author)),
+            )
+            for name, post_list in feeds:
+                self.report(name, post_list, options['repeat'])
+
+    def report(self, name, post_list, repeat):
+        paginator = KeysetPaginator(post_list, settings.PAGE_LIMIT)
+        limit = paginator.per_page + 1
+        # Курсор глубоко в ленте: последняя запись на 90% её длины
+        depth = paginator.object_list.count() * 9 // 10
+        deep_row = paginator.object_list[depth]
+        deep_cursor = paginator.encode_cursor(deep_row, NEXT)
+        first_page = paginator.cursor_queryset()[0][:limit]
+        deep_page = paginator.cursor_queryset(deep_cursor)[0][:limit]
+        offset_page = paginator.object_list[depth:depth + limit]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+        plan = explain(deep_page)
+        for line in plan:
+            self.stdout.write(f'  {line}')
+        sorted_in_memory = any('TEMP B-TREE' in line for line in plan)
+        uses_index = any('USING INDEX post_' in line for line in plan)
+        if uses_index and not sorted_in_memory:
+            self.stdout.write(self.style.SUCCESS('  план по индексу'))
+        else:
+            self.stdout.write(
+                self.style.WARNING('  запрос требует сортировки'))
+        for label, queryset in (
+            ('первая страница', first_page),
+            (f'курсор на {depth}-й записи', deep_page),
+            (f'OFFSET {depth}', offset_page),
+        ):
+            timings = measure(lambda: list(queryset.all()), repeat)
+            self.stdout.write(
+                f'  {label}: {statistics.median(timings):.2f} мс')
@@ -0,0 +1,61 @@
+import os
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmark import benchmark_database, measure
+from posts.benchmark import seed
+from posts.models import Post
+from posts.search import (attach_snippets, install_search_index,
+                          search_posts)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск по индексу FTS5 с фильтром icontains '
+            'на засеянной базе SQLite')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--authors', type=int, default=5000)
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--db-file',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров; засеянные данные переиспользуются')
+        parser.add_argument(
+            'queries', nargs='*',
+            help='Поисковые запросы; по умолчанию берутся слова из постов')
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['db_file']) as connection:
+            seed(options['posts'], options['authors'], options['groups'],
+                 self.stdout)
+            install_search_index(connection)
+            queries = options['queries'] or self.sample_queries()
+            limit = settings.PAGE_LIMIT + 1
+            for query in queries:
+                fts = search_posts(query).order_by('rank', 'pk')[:limit]
+                like = Post.objects.for_feed()
+                for word in query.split():
+                    like = like.filter(text__icontains=word)
+                like = like.order_by('-pub_date', '-pk')[:limit]
+                self.stdout.write(self.style.MIGRATE_HEADING(f'«{query}»:'))
+                for label, page in (
+                    ('FTS5', lambda: attach_snippets(list(fts.all()), query)),
+                    ('icontains', lambda: list(like.all())),
+                ):
+                    timings = measure(page, options['repeat'])
+                    self.stdout.write(
+                        f'  {label}: {statistics.median(timings):.2f} мс')
+
+    def sample_queries(self):
+        """Самое частое и самое редкое слово первых постов, их пара
+        и слово, которого нет в базе."""
+        words = ' '.join(
+            Post.objects.order_by('pk').values_list('text', flat=True)[:1000]
+        ).split()
+        frequent = max(set(words), key=words.count)
+        rare = min(set(words), key=words.count)
+        return [frequent, rare, f'{rare} {frequent}', 'отсутствующееслово']
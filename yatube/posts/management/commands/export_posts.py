@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import CHUNK_SIZE, FORMATS, export_rows, parse_filters
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты в JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--author', help='Имя пользователя автора')
+        parser.add_argument('--group', help='Адрес (slug) группы')
+        parser.add_argument('--since', help='С даты, ГГГГ-ММ-ДД')
+        parser.add_argument('--until', help='По дату, ГГГГ-ММ-ДД')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_filters(
+                options['author'], options['group'],
+                options['since'], options['until'])
+        except ValueError as error:
+            raise CommandError(error)
+        rows = export_rows(options['format'], filters, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(rows)
+        else:
+            for row in rows:
+                self.stdout.write(row, ending='')
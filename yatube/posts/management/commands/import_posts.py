@@ -0,0 +1,47 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS
+from posts.importer import BATCH_SIZE, PostImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Пакетно импортирует посты из JSONL или CSV (формат выгрузки '
+            'export_posts); авторы ищутся по имени пользователя')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки или - для stdin')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--no-create-groups', action='store_false', dest='create_groups',
+            help='Не создавать недостающие группы')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        if path != '-' and not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}')
+        importer = PostImporter(
+            options['batch_size'], options['create_groups'])
+        stream = sys.stdin if path == '-' else open(
+            path, encoding='utf-8', newline='')
+        try:
+            elapsed = importer.run(read_rows(stream, fmt), self.report)
+        except ValueError as error:
+            raise CommandError(
+                f'{error}; импортировано {importer.imported} строк')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        rate = importer.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {importer.imported}, пропущено '
+            f'{importer.skipped} за {elapsed:.1f} с ({rate:.0f} строк/с)'))
+
+    def report(self, imported, elapsed):
+        self.stdout.write(
+            f'{imported} строк, {imported / elapsed:.0f} строк/с')
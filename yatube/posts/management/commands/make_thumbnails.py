@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import schedule_thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие миниатюры картинок всех постов '
+            'в пуле процессов')
+
+    def handle(self, *args, **options):
+        images = (
+            Post.objects.exclude(image='')
+            .values_list('image', 'image_width').iterator()
+        )
+        jobs = [schedule_thumbnails(name, width) for name, width in images]
+        made = 0
+        for job in jobs:
+            if job is None:
+                continue
+            # При THUMBNAIL_WORKERS = 0 вместо задачи сразу список файлов
+            made += len(job if isinstance(job, list) else job.result())
+        self.stdout.write(f'Создано миниатюр: {made}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов (FTS5)'
+
+    def handle(self, *args, **options):
+        install_search_index(connection, rebuild=True)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересобран'))
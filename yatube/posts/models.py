@@ -1,30 +1,70 @@
 from django.contrib.auth import get_user_model
-from django.db import models
-from pytils.translit import slugify
+from django.db import IntegrityError, models, transaction
+
+from .slugs import SlugAllocator
+from .thumbnails import feed_widths, thumbnail_name
 
 User = get_user_model()
 
+# Сколько раз пробовать новый адрес, если его одновременно занял
+# другой запрос
+SLUG_ATTEMPTS = 5
+
 
 class Group(models.Model):
     title = models.CharField('Имя', max_length=200, unique=True)
     slug = models.SlugField('Адрес', unique=True)
     description = models.TextField('Описание')
+    posts_count = models.PositiveIntegerField(
+        'Число постов', default=0, editable=False)
 
     def __str__(self):
         return self.title
 
     # Расширение встроенного метода save(): если поле slug не заполнено -
-    # транслитерировать в латиницу содержимое поля title и
-    # обрезать до ста знаков
+    # транслитерировать в латиницу содержимое поля title, обрезать
+    # до ста знаков и при совпадении с занятым адресом добавить номер
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)[:100]
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        allocator = SlugAllocator(type(self)._default_manager)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocator.allocate(self.title)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Конфликт не по адресу (например, по названию) не лечится
+                # новым номером
+                taken = type(self)._default_manager.filter(slug=self.slug)
+                if attempt == SLUG_ATTEMPTS - 1 or not taken.exists():
+                    self.slug = ''
+                    raise
+                allocator.forget(self.title)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор и группа загружаются одним запросом,
+        выбираются только поля, которые выводят шаблоны."""
+        return self.select_related('author', 'group').only(
+            'text',
+            'pub_date',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__title',
+            'group__slug',
+            'image',
+            'image_width',
+            'image_height',
+        )
 
 
 class Post(models.Model):
     text = models.TextField('Текст', help_text='Введите текст поста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -40,9 +80,157 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост'
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        width_field='image_width',
+        height_field='image_height',
+    )
+    # Размеры запоминаются при загрузке, чтобы шаблоны не открывали файл
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        # Индексы повторяют порядок лент (-pub_date, -id), поэтому
+        # главная, страница группы и профиль читаются без сортировки
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+    def thumbnails(self):
+        """(адрес, ширина, высота) миниатюр ленты и исходной картинки.
+
+        Считается по сохранённым размерам, без чтения файла.
+        """
+        if not self.image or not self.image_width:
+            return []
+        sizes = [
+            (thumbnail_name(self.image.name, width), width,
+             max(1, round(self.image_height * width / self.image_width)))
+            for width in feed_widths(self.image_width)
+        ]
+        sizes.append((self.image.name, self.image_width, self.image_height))
+        storage = self.image.storage
+        return [(storage.url(name), width, height)
+                for name, width, height in sizes]
+
+    def image_srcset(self):
+        return ', '.join(
+            f'{url} {width}w' for url, width, _ in self.thumbnails())
+
+    def save(self, *args, **kwargs):
+        # Счётчики постов обновляются обработчиками post_save
+        # в той же транзакции, что и сам пост
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class AuthorCounter(models.Model):
+    """Хранимое число постов автора, чтобы не считать их на каждой
+    странице."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_counter',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0)
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'),
+        ]
+        # Рассылка нового поста выбирает подписчиков автора
+        indexes = [
+            models.Index(fields=['author', 'user'], name='follow_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя.
+
+    Строки создаются при публикации (fan-out on write), поэтому лента
+    читается по индексу одного пользователя, без сортировки постов
+    всех его авторов. Дата поста и автор продублированы для порядка
+    ленты и быстрой отписки.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
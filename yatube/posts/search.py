@@ -0,0 +1,104 @@
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# Маркеры подсветки в сниппете: управляющие символы не встречаются
+# в тексте постов и заменяются на <mark> уже после экранирования
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 24
+
+CREATE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')"
+)
+# Триггеры держат внешний индекс FTS5 в согласии с таблицей постов.
+# Пересоздание таблицы при миграциях SQLite удаляет триггеры, поэтому
+# они ставятся заново после каждой миграции (см. PostsConfig.ready)
+TRIGGERS_SQL = (
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert "
+    f"AFTER INSERT ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete "
+    f"AFTER DELETE ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+    f"AFTER UPDATE OF text ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); "
+    f"END",
+)
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def install_search_index(connection, rebuild=False):
+    """Создаёт индекс и триггеры, если их нет; rebuild перечитывает посты."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for sql in TRIGGERS_SQL:
+            cursor.execute(sql)
+        if rebuild:
+            cursor.execute(REBUILD_SQL)
+
+
+def match_query(text):
+    """Превращает ввод пользователя в запрос FTS5 из фраз в кавычках.
+
+    Операторы FTS5 в пользовательском вводе не работают, все слова
+    должны встретиться в посте.
+    """
+    terms = text.split()
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def matching(text):
+    """Условие для фильтра: пост найден полнотекстовым индексом."""
+    return Q(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match_query(text),)
+    ))
+
+
+def search_posts(text):
+    """Посты, найденные по тексту, с рангом bm25 в поле rank.
+
+    Чем меньше rank, тем выше пост в выдаче.
+    """
+    return Post.objects.for_feed().extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = posts_post.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match_query(text)],
+    ).annotate(rank=RawSQL(f'{FTS_TABLE}.rank', ()))
+
+
+def attach_snippets(posts, text):
+    """Добавляет постам страницы сниппеты с подсветкой одним запросом.
+
+    Сниппеты строятся только для показанных постов, а не для всех
+    найденных перед сортировкой по рангу.
+    """
+    ids = [post.pk for post in posts]
+    if not ids:
+        return
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, '…', %s) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"AND rowid IN ({placeholders})",
+            [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS,
+             match_query(text), *ids]
+        )
+        snippets = dict(cursor.fetchall())
+    for post in posts:
+        post.snippet = snippets.get(post.pk, post.text)
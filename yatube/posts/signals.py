@@ -0,0 +1,151 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .counters import (change_author_count, change_follower_count,
+                       change_group_count)
+from .feed_cache import (GROUPS_FEED, INDEX_FEED, author_feed, group_feed,
+                         invalidate_feeds)
+from .models import Follow, Group, Post, TimelineEntry, User
+from .thumbnails import schedule_thumbnails
+from .timeline import backfill, fan_out, resume_fan_out
+
+
+def invalidate_after_commit(*feeds):
+    """Сдвигает версии лент сразу и ещё раз после коммита.
+
+    Сразу - чтобы сама транзакция видела свои изменения; после коммита -
+    потому что до него параллельный читатель видит старые данные и может
+    положить их в кеш уже под новой версией.
+    """
+    invalidate_feeds(*feeds)
+    transaction.on_commit(partial(invalidate_feeds, *feeds))
+
+
+def invalidate_post_feeds(post, *group_slugs):
+    """Сбрасывает кеш главной, ленты автора и лент групп поста."""
+    feeds = [INDEX_FEED, author_feed(post.author.username)]
+    if post.group_id is not None:
+        feeds.append(group_feed(post.group.slug))
+    feeds.extend(group_feed(slug) for slug in group_slugs if slug)
+    invalidate_after_commit(*feeds)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, raw, **kwargs):
+    """Запоминает прежние группу и картинку редактируемого поста."""
+    instance._previous_group_id = None
+    instance._previous_group_slug = None
+    instance._previous_image = None
+    if instance.pk and not raw:
+        previous = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'group__slug', 'image').first()
+        )
+        if previous is not None:
+            (instance._previous_group_id,
+             instance._previous_group_slug,
+             instance._previous_image) = previous
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        change_group_count(previous_group_id, -1)
+        change_group_count(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, raw, **kwargs):
+    if not raw:
+        invalidate_post_feeds(
+            instance, getattr(instance, '_previous_group_slug', None))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    invalidate_post_feeds(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    invalidate_after_commit(GROUPS_FEED)
+
+
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_name(sender, instance, raw, update_fields=None,
+                           **kwargs):
+    """Запоминает имя автора: оно выводится в лентах, RSS и API."""
+    instance._previous_name = None
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+            AUTHOR_NAME_FIELDS):
+        # Например, last_login при входе
+        return
+    instance._previous_name = User.objects.filter(
+        pk=instance.pk).values_list(*AUTHOR_NAME_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_author(sender, instance, created, raw, **kwargs):
+    previous = getattr(instance, '_previous_name', None)
+    current = tuple(getattr(instance, name) for name in AUTHOR_NAME_FIELDS)
+    if created or raw or previous is None or previous == current:
+        return
+    slugs = Group.objects.filter(posts__author=instance).values_list(
+        'slug', flat=True).distinct()
+    invalidate_after_commit(
+        INDEX_FEED, author_feed(previous[0]),
+        author_feed(instance.username), *map(group_feed, slugs))
+
+
+@receiver(post_save, sender=Post)
+def make_post_thumbnails(sender, instance, raw, **kwargs):
+    """Миниатюры новой картинки создаются вне запроса, после коммита."""
+    if raw or not instance.image:
+        return
+    if instance.image.name == getattr(instance, '_previous_image', None):
+        return
+    transaction.on_commit(partial(
+        schedule_thumbnails, instance.image.name, instance.image_width))
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def start_following(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_follower_count(instance.author_id, 1)
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def stop_following(sender, instance, **kwargs):
+    change_follower_count(instance.author_id, -1)
+    TimelineEntry.objects.filter(
+        user_id=instance.user_id, author_id=instance.author_id).delete()
+    resume_fan_out(instance.author_id)
@@ -0,0 +1,88 @@
+import re
+from functools import lru_cache
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+SLUG_MAX_LENGTH = 100
+# Сколько знаков в конце длинного адреса может занять номер «-N»
+SUFFIX_RESERVE = 10
+SUFFIX = re.compile(r'-(\d+)$')
+# Адрес для названий без букв и цифр, например «!!!»
+DEFAULT_SLUG = 'group'
+
+
+@lru_cache(maxsize=4096)
+def make_slug(title):
+    """Транслитерирует название группы в адрес не длиннее ста знаков."""
+    slug = slugify(title)[:SLUG_MAX_LENGTH]
+    return slug if slug.strip('-') else DEFAULT_SLUG
+
+
+def with_suffix(base, number):
+    """Адрес с номером: base, base-2, base-3 и так далее."""
+    if number == 1:
+        return base
+    suffix = f'-{number}'
+    return base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+
+
+def number_of(base, slug):
+    """Номер, под которым slug выдан для base, или None для чужого
+    адреса."""
+    if slug == base:
+        return 1
+    match = SUFFIX.search(slug)
+    if match and with_suffix(base, int(match.group(1))) == slug:
+        return int(match.group(1))
+    return None
+
+
+def suffixed_pattern(base):
+    """Регулярное выражение для адресов base-N.
+
+    У длинного base номер заменяет конец адреса, поэтому для каждой
+    длины номера получается свой префикс.
+    """
+    lengths = {}
+    for digits in range(1, SUFFIX_RESERVE):
+        prefix = base[:SLUG_MAX_LENGTH - len('-') - digits]
+        lengths.setdefault(prefix, []).append(digits)
+    alternatives = [
+        f'{re.escape(prefix)}-[0-9]{{{min(digits)},{max(digits)}}}'
+        for prefix, digits in lengths.items()
+    ]
+    return f'^({"|".join(alternatives)})$'
+
+
+class SlugAllocator:
+    """Выдаёт свободные адреса групп.
+
+    Занятые номера одного адреса читаются одним запросом,
+    дальше следующий номер берётся из памяти. Поэтому массовое создание
+    групп с одинаковыми названиями не превращается в перебор
+    «base-2, base-3, ...» с запросом на каждый вариант.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.next_numbers = {}
+
+    def allocate(self, title):
+        base = make_slug(title)
+        if base not in self.next_numbers:
+            self.next_numbers[base] = self._first_free(base)
+        number = self.next_numbers[base]
+        self.next_numbers[base] = number + 1
+        return with_suffix(base, number)
+
+    def forget(self, title):
+        """Сбрасывает запомненный номер, например после IntegrityError."""
+        self.next_numbers.pop(make_slug(title), None)
+
+    def _first_free(self, base):
+        taken = self.queryset.filter(
+            Q(slug=base) | Q(slug__regex=suffixed_pattern(base))
+        ).values_list('slug', flat=True)
+        numbers = [number_of(base, slug) for slug in taken]
+        return max(filter(None, numbers), default=0) + 1
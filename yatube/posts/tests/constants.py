@@ -5,3 +5,4 @@ GROUP_DESCRIPTION = 'Тестовое описание'
 USERNAME = 'Test User'
 PAGE_LIMIT = 10
 PAGE_NUMBER = 'page'
+PAGE_CURSOR = 'cursor'
@@ -0,0 +1,152 @@
+import json
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..tests import constants
+
+
+def read_json(response):
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return response.json()
+
+
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=constants.USERNAME, first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        for i in range(7):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group)
+        cls.posts = list(Post.objects.order_by('-pub_date', '-pk'))
+        cls.POST_LIST = reverse('posts:api_post_list')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cursor_pages_walk_whole_feed(self):
+        seen = []
+        params = {'limit': 3}
+        while True:
+            data = read_json(self.client.get(self.POST_LIST, params))
+            seen.extend(post['id'] for post in data['results'])
+            if data['next'] is None:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(seen, [post.pk for post in self.posts])
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = read_json(self.client.get(self.POST_LIST, {'limit': 3}))
+        second = read_json(self.client.get(
+            self.POST_LIST, {'limit': 3, 'cursor': first['next']}))
+        back = read_json(self.client.get(
+            self.POST_LIST, {'limit': 3, 'cursor': second['previous']}))
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_page_is_streamed_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.POST_LIST)
+            data = read_json(response)
+        self.assertTrue(response.streaming)
+        post = data['results'][0]
+        self.assertEqual(post['author'], constants.USERNAME)
+        self.assertEqual(post['author_name'], 'Лев Толстой')
+        self.assertEqual(post['group'], self.group.slug)
+
+    def test_sparse_fieldset_selects_only_requested_columns(self):
+        with self.assertNumQueries(1) as context:
+            data = read_json(
+                self.client.get(self.POST_LIST, {'fields': 'id,text'}))
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        sql = context.captured_queries[0]['sql']
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"updated"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.POST_LIST, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('secret', response.json()['detail'])
+
+    def test_ids_resolved_in_one_query(self):
+        ids = [self.posts[3].pk, self.posts[0].pk, 10 ** 6]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.POST_LIST,
+                {'ids': ','.join(map(str, ids)), 'fields': 'id'})
+        self.assertEqual(response.json()['results'],
+                         [{'id': ids[0]}, {'id': ids[1]}])
+
+    def test_bad_ids_and_limit_are_rejected(self):
+        for params in ({'ids': '1,x'}, {'ids': ','}, {'limit': 0},
+                       {'limit': 10 ** 6}):
+            with self.subTest(params=params):
+                response = self.client.get(self.POST_LIST, params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_detail_group_and_profile(self):
+        post = self.posts[0]
+        data = self.client.get(reverse(
+            'posts:api_post_detail', kwargs={'post_id': post.pk})).json()
+        self.assertEqual(data['text'], post.text)
+        data = self.client.get(reverse(
+            'posts:api_group_detail', kwargs={'slug': self.group.slug}),
+            {'fields': 'title,posts_count'}).json()
+        self.assertEqual(
+            data, {'title': self.group.title, 'posts_count': 7})
+        data = self.client.get(reverse(
+            'posts:api_profile',
+            kwargs={'username': self.user.username})).json()
+        self.assertEqual(data['name'], 'Лев Толстой')
+        self.assertEqual(data['posts_count'], 7)
+        self.assertEqual(data['followers_count'], 0)
+        groups = read_json(self.client.get(reverse('posts:api_group_list')))
+        self.assertEqual(
+            [group['slug'] for group in groups['results']], [self.group.slug])
+
+    def test_group_and_profile_posts(self):
+        other = Group.objects.create(title='Другая', slug='other',
+                                     description='-')
+        Post.objects.create(author=self.user, text='Вне группы', group=other)
+        for url in (
+            reverse('posts:api_group_posts',
+                    kwargs={'slug': self.group.slug}),
+            reverse('posts:api_profile_posts',
+                    kwargs={'username': self.user.username}),
+        ):
+            with self.subTest(url=url):
+                data = read_json(self.client.get(url, {'fields': 'text'}))
+                texts = [post['text'] for post in data['results']]
+                self.assertEqual(
+                    'Вне группы' in texts, 'profiles' in url)
+
+    def test_missing_objects_are_json_404(self):
+        for url in (
+            reverse('posts:api_post_detail', kwargs={'post_id': 10 ** 6}),
+            reverse('posts:api_group_posts', kwargs={'slug': 'nope'}),
+            reverse('posts:api_profile', kwargs={'username': 'nope'}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertIn('detail', response.json())
+
+    def test_unchanged_list_returns_304_and_writes_are_refused(self):
+        etag = self.client.get(self.POST_LIST)['ETag']
+        response = self.client.get(self.POST_LIST, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.client.post(self.POST_LIST)
+        self.assertEqual(
+            response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import AuthorCounter, Follow, Group, Post, User
+from ..tests import constants
+
+
+class ImportPostsCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+
+    def _import(self, rows, suffix='.jsonl', **options):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(rows)
+        self.addCleanup(os.remove, path)
+        output = StringIO()
+        call_command('import_posts', path, stdout=output, **options)
+        return output.getvalue()
+
+    def test_import_jsonl_keeps_dates_and_counts(self):
+        """Импорт сохраняет даты источника и сдвигает счётчики."""
+        rows = [
+            {'text': f'Импорт {number}', 'author': self.user.username,
+             'group': self.group.slug,
+             'pub_date': '2020-01-0{}T10:00:00+00:00'.format(number + 1)}
+            for number in range(3)
+        ]
+        rows.append({'text': 'Чужой пост', 'author': 'unknown'})
+        output = self._import(
+            ''.join(json.dumps(row) + '\n' for row in rows), batch_size=2)
+        self.assertIn('Импортировано 3, пропущено 1', output)
+        post = Post.objects.get(text='Импорт 0')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.updated, post.pub_date)
+        self.assertEqual(
+            list(Post.objects.filter(text__startswith='Импорт').order_by(
+                'pk').values_list('pub_date__day', flat=True)),
+            [1, 2, 3])
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).posts_count, 3)
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.user).posts_count, 3)
+        # Поля модели не меняются: обычное сохранение ставит текущее время
+        fresh = Post.objects.create(author=self.user, text='Новый')
+        self.assertGreater(fresh.pub_date.year, 2020)
+
+    def test_imported_posts_reach_follower_timelines(self):
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        rows = ''.join(
+            json.dumps({'text': f'Импорт {number}',
+                        'author': self.user.username}) + '\n'
+            for number in range(3))
+        self._import(rows, batch_size=2)
+        self.assertEqual(
+            set(reader.timeline.values_list('post_id', flat=True)),
+            set(Post.objects.filter(
+                text__startswith='Импорт').values_list('pk', flat=True)))
+
+    def test_import_csv_creates_missing_groups(self):
+        """Недостающие группы создаются с адресом из названия."""
+        rows = (
+            'text,author,group,group_title\n'
+            f'Первый,{self.user.username},,Новая группа\n'
+            f'Второй,{self.user.username},,Новая группа\n'
+        )
+        self._import(rows, suffix='.csv')
+        group = Group.objects.get(title='Новая группа')
+        self.assertEqual(group.slug, 'novaya-gruppa')
+        self.assertEqual(group.posts.count(), 2)
+
+    def test_export_import_round_trip(self):
+        Post.objects.create(
+            author=self.user, text=constants.POST_TEXT, group=self.group)
+        exported = StringIO()
+        call_command('export_posts', format='csv', stdout=exported)
+        Post.objects.all().delete()
+        self._import(exported.getvalue(), suffix='.csv')
+        post = Post.objects.get()
+        self.assertEqual(post.text, constants.POST_TEXT)
+        self.assertEqual(post.group, self.group)
+
+    def test_import_allocates_colliding_group_slugs(self):
+        rows = ''.join(
+            json.dumps({'text': 'Пост', 'author': self.user.username,
+                        'group_title': title}) + '\n'
+            for title in ('Клуб', 'Клуб!', 'Клуб?', 'Клуб')
+        )
+        self._import(rows)
+        self.assertEqual(
+            sorted(Group.objects.filter(
+                title__startswith='Клуб').values_list('slug', flat=True)),
+            ['klub', 'klub-2', 'klub-3'])
+        self.assertEqual(Group.objects.get(title='Клуб').posts.count(), 2)
+
+    def test_import_reports_broken_line(self):
+        rows = (json.dumps({'text': 'Пост', 'author': self.user.username})
+                + '\n{"text": \n')
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            self._import(rows)
@@ -1,10 +1,26 @@
-from django.test import Client, TestCase
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Group, Post, User
 from ..tests import constants
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='image.png', size=(1000, 500)):
+    """Загружаемая картинка PNG нужного размера."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
 
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostsFormsTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -27,6 +43,11 @@ class PostsFormsTests(TestCase):
             description=f'{constants.GROUP_DESCRIPTION}_2',
         )
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         self.guest_client = Client()
         self.authorized_client = Client()
@@ -52,6 +73,18 @@ class PostsFormsTests(TestCase):
         self.assertEqual(post.group.id, self.group.id)
         self.assertEqual(post.author, self.user)
 
+    def test_create_post_with_image(self):
+        """Картинка сохраняется вместе с размерами."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'С картинкой', 'image': make_image()},
+        )
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': self.user}))
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual(post.image.name, 'posts/image.png')
+        self.assertEqual((post.image_width, post.image_height), (1000, 500))
+
     def test_edit_post(self):
         post_count = Post.objects.count()
         form_data = {
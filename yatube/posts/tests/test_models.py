@@ -1,6 +1,12 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import AuthorCounter, Group, Post, User
+from ..slugs import SlugAllocator, number_of
 from ..tests import constants
 
 
@@ -63,3 +69,113 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.group_2 = Group.objects.create(
+            title=f'{constants.GROUP_TITLE}_2',
+            slug=f'{constants.GROUP_SLUG}_2',
+            description=f'{constants.GROUP_DESCRIPTION}_2',
+        )
+
+    def _assert_counts(self, author_count, group_count, group_2_count):
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.user).posts_count,
+            author_count)
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).posts_count, group_count)
+        self.assertEqual(
+            Group.objects.get(pk=self.group_2.pk).posts_count, group_2_count)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, смене группы и удалении."""
+        post = Post.objects.create(
+            author=self.user, text=constants.POST_TEXT, group=self.group)
+        Post.objects.create(author=self.user, text=constants.POST_TEXT)
+        self._assert_counts(2, 1, 0)
+        post.group = self.group_2
+        post.save()
+        self._assert_counts(2, 0, 1)
+        post.delete()
+        self._assert_counts(1, 0, 0)
+
+    def test_rebuild_post_counters_command(self):
+        """Команда rebuild_post_counters восстанавливает счётчики."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=constants.POST_TEXT, group=self.group)
+            for _ in range(3)
+        ])
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self._assert_counts(3, 3, 0)
+
+
+class GroupSlugTest(TestCase):
+    def test_colliding_slugs_get_next_number(self):
+        """Названия с одинаковой транслитерацией получают номера."""
+        titles = ('Тест', 'Тест!', 'Тест?')
+        groups = [
+            Group.objects.create(title=title, description='')
+            for title in titles
+        ]
+        self.assertEqual(
+            [group.slug for group in groups], ['test', 'test-2', 'test-3'])
+
+    def test_long_colliding_slugs_get_next_number(self):
+        """Номер длинного адреса заменяет его конец и тоже учитывается."""
+        title = 'а' * 120
+        groups = [
+            Group.objects.create(title=title + mark, description='')
+            for mark in ('', '!', '?', '.')
+        ]
+        base = 'a' * 100
+        self.assertEqual(
+            [group.slug for group in groups],
+            [base, base[:98] + '-2', base[:98] + '-3', base[:98] + '-4'])
+
+    def test_title_without_letters_gets_default_slug(self):
+        groups = [
+            Group.objects.create(title=title, description='')
+            for title in ('!!!', '???')
+        ]
+        self.assertEqual(
+            [group.slug for group in groups], ['group', 'group-2'])
+
+    def test_allocator_ignores_other_slugs_with_same_prefix(self):
+        """Адреса вида test-drive-2 не считаются номерами test."""
+        for slug in ('test-drive', 'test-drive-2', 'test-02', 'tests-3'):
+            Group.objects.create(title=slug, slug=slug, description='')
+        allocator = SlugAllocator(Group.objects)
+        with mock.patch('posts.slugs.number_of',
+                        side_effect=number_of) as checked:
+            self.assertEqual(allocator.allocate('Тест'), 'test')
+        self.assertEqual(
+            [call.args[1] for call in checked.call_args_list], ['test-02'])
+
+    def test_allocator_reads_taken_slugs_once(self):
+        Group.objects.create(title='Тест', description='')
+        allocator = SlugAllocator(Group.objects)
+        with self.assertNumQueries(1):
+            slugs = [allocator.allocate('Тест') for _ in range(3)]
+        self.assertEqual(slugs, ['test-2', 'test-3', 'test-4'])
+
+    def test_slug_taken_concurrently_is_retried(self):
+        """Адрес, занятый параллельным запросом, заменяется следующим."""
+        Group.objects.create(title='Тест', description='')
+        with mock.patch.object(
+                SlugAllocator, '_first_free', side_effect=[1, 2]):
+            group = Group.objects.create(title='Тест!', description='')
+        self.assertEqual(group.slug, 'test-2')
+
+    def test_duplicate_title_is_not_retried(self):
+        Group.objects.create(title='Тест', description='')
+        with self.assertRaises(IntegrityError):
+            Group.objects.create(title='Тест', description='')
@@ -26,6 +26,7 @@ class PostURLTests(TestCase):
             (f'/group/{cls.group.slug}/', 'posts/group_list.html'),
             (f'/profile/{cls.user.username}/', 'posts/profile.html'),
             (f'/posts/{cls.post.id}/', 'posts/post_detail.html'),
+            ('/search/?q=тест', 'posts/search.html'),
         )
         cls.authorized_client_url_names = (
             ('/create/', 'posts/post_create.html'),
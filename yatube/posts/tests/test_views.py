@@ -1,9 +1,29 @@
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
 from django import forms
-from django.test import Client, TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import KeysetPaginator
+from core.tests.utils import run_on_commit
 
-from ..models import Group, Post, User
+from ..feed_cache import INDEX_FEED, feed_cache_stats, feed_versions
+from ..models import Follow, Group, Post, User
 from ..tests import constants
+from ..thumbnails import schedule_thumbnails, thumbnail_name
+from .test_forms import make_image
 
 
 class PostsURLTests(TestCase):
@@ -100,7 +120,8 @@ class PostsURLTests(TestCase):
         """Шаблон Post_create сформирован с правильным контекстом."""
         response = self.authorized_client.get(self.POST_CREATE[1])
         form_fields = {'text': forms.CharField,
-                       'group': forms.ModelChoiceField}
+                       'group': forms.ModelChoiceField,
+                       'image': forms.ImageField}
         for value, expected in form_fields.items():
             with self.subTest(value=value):
                 form_field = response.context.get('form').fields.get(value)
@@ -155,6 +176,7 @@ class PostsPaginatedTests(TestCase):
         ])
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
 
@@ -188,3 +210,694 @@ class PostsPaginatedTests(TestCase):
             for response in responses:
                 self.assertEqual(
                     len(response.context['page_obj']), page_list[page_number])
+
+    def test_pages_paginated_by_cursor(self):
+        """Курсоры ведут по ленте без пропусков и повторов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        for url in urls:
+            with self.subTest(url=url):
+                first_page = self.guest_client.get(url).context['page_obj']
+                self.assertFalse(first_page.has_previous())
+                self.assertTrue(first_page.has_next())
+                second_page = self.guest_client.get(url, {
+                    constants.PAGE_CURSOR: first_page.next_cursor
+                }).context['page_obj']
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    [post.pk for post in first_page]
+                    + [post.pk for post in second_page],
+                    expected
+                )
+                previous_page = self.guest_client.get(url, {
+                    constants.PAGE_CURSOR: second_page.previous_cursor
+                }).context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in previous_page],
+                    [post.pk for post in first_page]
+                )
+
+    def test_cursor_page_skips_count_query(self):
+        """Страница по курсору не считает записи через COUNT(*)."""
+        paginator = KeysetPaginator(Post.objects.all(), constants.PAGE_LIMIT)
+        page = paginator.get_cursor_page()
+        with self.assertNumQueries(1):
+            paginator.get_cursor_page(page.next_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:index'), {constants.PAGE_CURSOR: 'broken'})
+        self.assertEqual(
+            len(response.context['page_obj']), constants.PAGE_LIMIT)
+
+
+class PostsFeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        for number in range(constants.PAGE_LIMIT):
+            author = User.objects.create_user(username=f'author_{number}')
+            group = Group.objects.create(
+                title=f'{constants.GROUP_TITLE}_{number}',
+                slug=f'{constants.GROUP_SLUG}_{number}',
+                description=constants.GROUP_DESCRIPTION,
+            )
+            Post.objects.create(
+                author=author, group=group, text=constants.POST_TEXT)
+        Post.objects.bulk_create([
+            Post(author=cls.user, group=cls.group, text=constants.POST_TEXT)
+            for _ in range(constants.PAGE_LIMIT)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feed_pages_query_count(self):
+        """Число запросов на страницу ленты не зависит от числа постов."""
+        feeds = (
+            (reverse('posts:index'), 1),
+            (reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+             2),
+            (reverse('posts:profile', kwargs={
+                'username': self.user.username}), 2),
+        )
+        for url, queries in feeds:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(url)
+                self.assertEqual(
+                    len(response.context['page_obj']), constants.PAGE_LIMIT)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.group_2 = Group.objects.create(
+            title=f'{constants.GROUP_TITLE}_2',
+            slug=f'{constants.GROUP_SLUG}_2',
+            description=f'{constants.GROUP_DESCRIPTION}_2',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text=constants.POST_TEXT, group=cls.group)
+        cls.INDEX = reverse('posts:index')
+        cls.GROUP_LIST = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug})
+        cls.GROUP_2_LIST = reverse(
+            'posts:group_list', kwargs={'slug': cls.group_2.slug})
+        cls.PROFILE = reverse(
+            'posts:profile', kwargs={'username': cls.user.username})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный запрос анонима отдаётся из кеша без запросов к БД."""
+        for url in (self.INDEX, self.GROUP_LIST, self.PROFILE):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                hits = feed_cache_stats()['hits']
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+                self.assertEqual(feed_cache_stats()['hits'], hits + 1)
+
+    def test_new_post_invalidates_only_affected_feeds(self):
+        """Новый пост сбрасывает главную, ленту группы и автора."""
+        urls = (self.INDEX, self.GROUP_LIST, self.PROFILE, self.GROUP_2_LIST)
+        for url in urls:
+            self.guest_client.get(url)
+        with run_on_commit():
+            Post.objects.create(
+                author=self.user, text='Свежий пост', group=self.group)
+        for url in urls[:3]:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Свежий пост')
+        misses = feed_cache_stats()['misses']
+        self.guest_client.get(self.GROUP_2_LIST)
+        self.assertEqual(feed_cache_stats()['misses'], misses)
+
+    def test_feed_version_bumped_again_after_commit(self):
+        """После коммита версия сдвигается ещё раз: страница, которую
+        успели закешировать до коммита, устаревает."""
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Свежий пост')
+            before_commit = feed_versions((INDEX_FEED,))
+        self.assertNotEqual(feed_versions((INDEX_FEED,)), before_commit)
+
+    def test_author_rename_invalidates_feeds(self):
+        """Новое имя автора сразу видно на главной и в ленте группы."""
+        urls = (self.INDEX, self.GROUP_LIST, self.PROFILE)
+        for url in urls:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Переименованный'
+        with run_on_commit():
+            author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Переименованный')
+
+    def test_login_keeps_feeds_cached(self):
+        """Вход автора (запись last_login) не сбрасывает кеш лент."""
+        self.guest_client.get(self.INDEX)
+        with run_on_commit():
+            self.authorized_client.force_login(self.user)
+        hits = feed_cache_stats()['hits']
+        self.guest_client.get(self.INDEX)
+        self.assertEqual(feed_cache_stats()['hits'], hits + 1)
+
+    def test_authorized_user_bypasses_cache(self):
+        stats = feed_cache_stats()
+        self.authorized_client.get(self.INDEX)
+        self.assertEqual(feed_cache_stats(), stats)
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пишем <b>тесты</b> на Django')
+        cls.other_post = Post.objects.create(
+            author=cls.user, text='Совсем другой пост')
+        cls.SEARCH = reverse('posts:search')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def _found(self, query):
+        response = self.guest_client.get(self.SEARCH, {'q': query})
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_finds_post_by_word(self):
+        """Поиск находит пост по слову без учёта регистра."""
+        self.assertEqual(self._found('ТЕСТЫ'), [self.post.pk])
+        self.assertEqual(self._found('тесты пост'), [])
+
+    def test_search_highlights_escaped_snippet(self):
+        response = self.guest_client.get(self.SEARCH, {'q': 'django'})
+        self.assertContains(response, '<mark>Django</mark>')
+        self.assertContains(response, '&lt;b&gt;')
+
+    def test_search_index_follows_post_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.other_post.text = 'Обновлённый текст'
+        self.other_post.save()
+        self.assertEqual(self._found('обновлённый'), [self.other_post.pk])
+        self.assertEqual(self._found('другой'), [])
+        self.other_post.delete()
+        self.assertEqual(self._found('обновлённый'), [])
+
+    def test_search_ranks_and_paginates_by_cursor(self):
+        """Выдача упорядочена по релевантности и листается курсором."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'поиск номер {number}')
+            for number in range(constants.PAGE_LIMIT)
+        ])
+        best = Post.objects.create(author=self.user, text='поиск поиск')
+        response = self.guest_client.get(self.SEARCH, {'q': 'поиск'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj[0].pk, best.pk)
+        self.assertContains(response, 'q=%D0%BF%D0%BE%D0%B8%D1%81%D0%BA')
+        response = self.guest_client.get(self.SEARCH, {
+            'q': 'поиск', constants.PAGE_CURSOR: page_obj.next_cursor})
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_admin_search_uses_search_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        admin_client = Client()
+        admin_client.force_login(admin)
+        response = admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'django'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text=constants.POST_TEXT, group=cls.group)
+        cls.FEEDS = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+        cls.POST_DETAIL = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_feed_returns_304(self):
+        """Неизменившаяся лента отвечает 304 без рендеринга шаблона."""
+        for url in self.FEEDS:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+
+    def test_new_post_changes_feed_etag(self):
+        etags = [self.guest_client.get(url)['ETag'] for url in self.FEEDS]
+        with run_on_commit():
+            Post.objects.create(
+                author=self.user, text=constants.POST_TEXT, group=self.group)
+        for url, etag in zip(self.FEEDS, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        url = self.FEEDS[0]
+        self.assertNotEqual(
+            self.guest_client.get(url)['ETag'],
+            self.authorized_client.get(url)['ETag'])
+
+    def test_post_detail_etag_follows_edit(self):
+        """Правка поста через post_edit меняет ETag."""
+        etag = self.authorized_client.get(self.POST_DETAIL)['ETag']
+        response = self.authorized_client.get(
+            self.POST_DETAIL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Новый текст'})
+        response = self.authorized_client.get(
+            self.POST_DETAIL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertGreater(
+            Post.objects.get(pk=self.post.pk).updated, self.post.updated)
+
+    def test_post_detail_without_last_modified(self):
+        """Страница поста зависит от группы, поэтому дата правки поста
+        не годится для If-Modified-Since."""
+        response = self.guest_client.get(self.POST_DETAIL)
+        self.assertNotIn('Last-Modified', response)
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.guest_client.get(
+            self.POST_DETAIL,
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2099 00:00:00 GMT')
+        self.assertContains(response, 'Новое название')
+
+
+class PostExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text=constants.POST_TEXT, group=cls.group)
+        Post.objects.create(author=cls.staff, text='Пост без группы')
+        cls.EXPORT = reverse('posts:export')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_export_is_staff_only(self):
+        response = self.authorized_client.get(self.EXPORT)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_export_streams_filtered_jsonl(self):
+        """Выгрузка JSONL потоковая и учитывает фильтры."""
+        response = self.staff_client.get(
+            self.EXPORT, {'group': self.group.slug})
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.post.pk)
+        self.assertEqual(rows[0]['author'], self.user.username)
+        self.assertEqual(rows[0]['group'], self.group.slug)
+
+    def test_export_csv(self):
+        response = self.staff_client.get(self.EXPORT, {'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'text', 'pub_date'])
+        self.assertEqual(len(lines), 1 + Post.objects.count())
+
+    def test_export_date_bounds_are_local_days(self):
+        """until включает весь день по местному времени."""
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.make_aware(datetime(2022, 3, 1, 23, 30)))
+        for params, found in (
+            ({'since': '2022-03-01', 'until': '2022-03-01'}, True),
+            ({'since': '2022-03-02'}, False),
+            ({'until': '2022-02-28'}, False),
+        ):
+            with self.subTest(params=params):
+                response = self.staff_client.get(self.EXPORT, params)
+                ids = [
+                    json.loads(line)['id'] for line in b''.join(
+                        response.streaming_content).decode().splitlines()
+                ]
+                self.assertEqual(self.post.pk in ids, found)
+
+    def test_export_rejects_bad_date(self):
+        response = self.staff_client.get(self.EXPORT, {'since': 'вчера'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_export_errors_are_not_html(self):
+        """Параметры запроса в тексте ошибки не отдаются как HTML."""
+        for params in ({'format': '<script>alert(1)</script>'},
+                       {'since': '<script>alert(1)</script>'}):
+            with self.subTest(params=params):
+                response = self.staff_client.get(self.EXPORT, params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+                self.assertTrue(
+                    response['Content-Type'].startswith('text/plain'))
+
+    def test_export_posts_command(self):
+        output = StringIO()
+        call_command(
+            'export_posts', author=self.staff.username, stdout=output)
+        rows = output.getvalue().splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])['text'], 'Пост без группы')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), THUMBNAIL_WORKERS=0)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=constants.USERNAME)
+        cls.post = Post.objects.create(
+            author=cls.user, text=constants.POST_TEXT, image=make_image())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.post.image.storage.location, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_thumbnails_use_stored_sizes(self):
+        """srcset строится по размерам из базы, без чтения файла."""
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        with self.assertNumQueries(0):
+            sizes = [(width, height) for _, width, height in post.thumbnails()]
+        self.assertEqual(
+            sizes, [(320, 160), (640, 320), (960, 480), (1000, 500)])
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, '/media/thumbs/320/posts/image.png 320w')
+        self.assertContains(response, 'width="1000" height="500"')
+
+    def test_thumbnails_rendered_and_served(self):
+        """Миниатюры создаются под детерминированными ключами и
+        отдаются файлом; пока миниатюры нет, отдаётся оригинал."""
+        name = thumbnail_name(self.post.image.name, 320)
+        url = reverse('core:media', args=[name])
+        response = self.guest_client.get(url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response.close()
+
+        schedule_thumbnails(self.post.image.name, self.post.image_width)
+        storage = self.post.image.storage
+        for width in (320, 640, 960):
+            with self.subTest(width=width):
+                path = storage.path(
+                    thumbnail_name(self.post.image.name, width))
+                self.assertTrue(os.path.exists(path))
+        response = self.guest_client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertIn('immutable', response['Cache-Control'])
+        with storage.open(name) as thumbnail:
+            self.assertEqual(
+                b''.join(response.streaming_content), thumbnail.read())
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_failed_background_thumbnails_are_logged(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        with mock.patch('posts.thumbnails.pool', return_value=executor), \
+                self.assertLogs('posts.thumbnails', 'ERROR') as logs:
+            schedule_thumbnails('posts/missing.png', 1000)
+            executor.shutdown(wait=True)
+        self.assertIn('posts/missing.png', logs.output[0])
+
+    def test_media_outside_root_is_404(self):
+        response = self.guest_client.get('/media/../settings.py')
+        self.assertEqual(response.status_code, 404)
+
+
+class FollowTimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self, author):
+        return self.reader_client.post(
+            reverse('posts:profile_follow', args=[author.username]))
+
+    def feed(self, cursor=None):
+        url = reverse('posts:follow_index')
+        if cursor:
+            url += f'?{constants.PAGE_CURSOR}={cursor}'
+        return self.reader_client.get(url).context['page_obj']
+
+    def test_follow_backfills_and_fans_out(self):
+        """Подписка переносит старые посты, новые рассылаются при
+        публикации; отписка убирает посты автора из ленты."""
+        response = self.follow(self.author)
+        self.assertRedirects(response, reverse(
+            'posts:profile', args=[self.author.username]))
+        self.assertEqual(self.author.post_counter.followers_count, 1)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(
+            list(self.reader.timeline.order_by('post_id')
+                 .values_list('post_id', flat=True)),
+            [self.old_post.pk, new_post.pk])
+        self.assertEqual(list(self.feed()), [new_post, self.old_post])
+
+        self.reader_client.post(
+            reverse('posts:profile_unfollow', args=[self.author.username]))
+        self.assertFalse(self.reader.timeline.exists())
+        self.author.post_counter.refresh_from_db()
+        self.assertEqual(self.author.post_counter.followers_count, 0)
+        self.assertEqual(list(self.feed()), [])
+
+    def test_follow_changes_profile_etag(self):
+        """После подписки и отписки старый ETag профиля не даёт 304."""
+        url = reverse('posts:profile', args=[self.author.username])
+        for action in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(action=action):
+                etag = self.reader_client.get(url)['ETag']
+                self.reader_client.post(
+                    reverse(action, args=[self.author.username]))
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(
+                    response.context['following'],
+                    action == 'posts:profile_follow')
+
+    def test_new_csrf_cookie_changes_profile_etag(self):
+        """Страница с формой подписки и старым CSRF-токеном не отдаётся
+        как 304 после смены куки."""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.reader_client.get(url)
+        etag = self.reader_client.get(url)['ETag']
+        self.assertEqual(
+            self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.NOT_MODIFIED)
+        self.reader_client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 64
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_cannot_follow_self_or_by_get(self):
+        self.reader_client.post(
+            reverse('posts:profile_follow', args=[self.reader.username]))
+        response = self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author.username]))
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+        self.assertFalse(self.reader.follower.exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled_and_merged(self):
+        """Посты популярного автора не рассылаются, а сливаются
+        с лентой при чтении; курсор проходит оба источника."""
+        with override_settings(TIMELINE_FANOUT_LIMIT=1):
+            self.follow(self.author)
+        self.follow(self.star)
+        posts = []
+        for index in range(12):
+            author = self.star if index % 2 else self.author
+            posts.append(Post.objects.create(author=author, text=str(index)))
+        self.assertFalse(
+            self.reader.timeline.filter(author=self.star).exists())
+        posts = [self.old_post] + posts
+        posts.reverse()
+
+        first = self.feed()
+        self.assertEqual(list(first), posts[:constants.PAGE_LIMIT])
+        self.assertTrue(first.has_next())
+        second = self.feed(first.next_cursor)
+        self.assertEqual(list(second), posts[constants.PAGE_LIMIT:])
+        self.assertFalse(second.has_next())
+        back = self.feed(second.previous_cursor)
+        self.assertEqual(list(back), posts[:constants.PAGE_LIMIT])
+
+    def test_author_back_under_limit_is_fanned_out(self):
+        """Когда подписчиков снова не больше лимита, посты автора,
+        вышедшие без рассылки, переносятся в ленты."""
+        other = User.objects.create_user(username='other')
+        with override_settings(TIMELINE_FANOUT_LIMIT=1):
+            self.follow(self.author)
+            Follow.objects.create(user=other, author=self.author)
+            pulled_post = Post.objects.create(author=self.author, text='П')
+            self.assertFalse(
+                self.reader.timeline.filter(post=pulled_post).exists())
+            Follow.objects.filter(user=other).delete()
+            self.assertTrue(
+                self.reader.timeline.filter(post=pulled_post).exists())
+            self.assertEqual(
+                list(self.feed()), [pulled_post, self.old_post])
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username=constants.USERNAME, first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text=constants.POST_TEXT, group=cls.group)
+        cls.FEEDS = {
+            reverse('posts:index_rss'): 'application/rss+xml',
+            reverse('posts:index_atom'): 'application/atom+xml',
+            reverse('posts:group_rss', kwargs={'slug': cls.group.slug}):
+                'application/rss+xml',
+            reverse('posts:group_atom', kwargs={'slug': cls.group.slug}):
+                'application/atom+xml',
+            reverse('posts:profile_rss',
+                    kwargs={'username': cls.user.username}):
+                'application/rss+xml',
+            reverse('posts:profile_atom',
+                    kwargs={'username': cls.user.username}):
+                'application/atom+xml',
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds_list_posts(self):
+        link = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        for url, content_type in self.FEEDS.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type))
+                self.assertContains(response, link)
+                self.assertContains(response, constants.POST_TEXT)
+                self.assertContains(response, 'Лев Толстой')
+                self.assertContains(response, constants.GROUP_TITLE)
+
+    def test_feed_items_loaded_in_one_query(self):
+        """Автор и группа записей не дочитываются по одной."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}', group=self.group)
+            for i in range(5)
+        )
+        url = reverse('posts:index_rss')
+        # Версии лент берутся из кеша, в базу уходит только выборка постов
+        with self.assertNumQueries(1):
+            self.guest_client.get(url)
+
+    def test_unchanged_feed_returns_304(self):
+        for url in self.FEEDS:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_xml_cached_until_post_changes(self):
+        for url in self.FEEDS:
+            self.guest_client.get(url)
+        for url in self.FEEDS:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.guest_client.get(url)
+        self.post.text = 'Исправленный текст'
+        with run_on_commit():
+            self.post.save()
+        for url in self.FEEDS:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), 'Исправленный текст')
+
+    def test_unknown_group_or_author_is_404(self):
+        for url in (
+            reverse('posts:group_rss', kwargs={'slug': 'nope'}),
+            reverse('posts:profile_atom', kwargs={'username': 'nope'}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code,
+                                 HTTPStatus.NOT_FOUND)
@@ -0,0 +1,106 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def thumbnail_name(image_name, width):
+    """Ключ миниатюры: одна и та же картинка и ширина дают один путь."""
+    return f'{settings.THUMBNAIL_DIR}/{width}/{image_name}'
+
+
+def original_name(name):
+    """Имя исходной картинки по ключу миниатюры или None."""
+    prefix, _, rest = name.partition('/')
+    width, _, image_name = rest.partition('/')
+    if prefix != settings.THUMBNAIL_DIR or not width.isdigit():
+        return None
+    return image_name or None
+
+
+def feed_widths(image_width):
+    """Ширины ленты, до которых стоит уменьшать картинку."""
+    return [
+        width for width in settings.THUMBNAIL_WIDTHS
+        if image_width and width < image_width
+    ]
+
+
+def render_thumbnails(source, targets):
+    """Уменьшает файл source до ширин из пар (ширина, путь).
+
+    Выполняется в отдельном процессе и не обращается к Django.
+    Готовые миниатюры не пересоздаются, файл появляется атомарно.
+    """
+    from PIL import Image
+
+    made = []
+    with Image.open(source) as image:
+        image.load()
+        image_format = image.format
+        for width, target in targets:
+            if os.path.exists(target):
+                continue
+            height = max(1, round(image.height * width / image.width))
+            thumbnail = image.resize((width, height), Image.LANCZOS)
+            if image_format == 'JPEG' and thumbnail.mode not in ('RGB', 'L'):
+                thumbnail = thumbnail.convert('RGB')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temporary = f'{target}.{os.getpid()}.tmp'
+            thumbnail.save(temporary, format=image_format, optimize=True)
+            os.replace(temporary, target)
+            made.append(target)
+    return made
+
+
+def pool():
+    """Общий для процесса пул; spawn, чтобы не форкать потоки сервера."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def schedule_thumbnails(image_name, image_width):
+    """Отдаёт создание миниатюр картинки пулу процессов.
+
+    При THUMBNAIL_WORKERS = 0 миниатюры создаются сразу, в текущем
+    процессе. Пути берутся из файлового хранилища default_storage.
+    """
+    targets = [
+        (width, default_storage.path(thumbnail_name(image_name, width)))
+        for width in feed_widths(image_width)
+    ]
+    if not targets:
+        return None
+    source = default_storage.path(image_name)
+    if not settings.THUMBNAIL_WORKERS:
+        return render_thumbnails(source, targets)
+    future = pool().submit(render_thumbnails, source, targets)
+    future.add_done_callback(
+        lambda future: log_failure(future, image_name))
+    return future
+
+
+def log_failure(future, image_name):
+    """Пишет в лог ошибку фоновой задачи: результат future никто
+    не ждёт, и без этого исключение потерялось бы."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error('Не удалось создать миниатюры %s', image_name,
+                     exc_info=error)
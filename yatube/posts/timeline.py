@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.db import connection
+
+from core.paginator import KeysetPage, KeysetPaginator
+
+from .models import AuthorCounter, Follow, Post, TimelineEntry
+
+
+def _insert_entries(select, params):
+    """INSERT ... SELECT строк ленты; уже существующие пропускаются."""
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{TimelineEntry._meta.db_table} '
+            f'(user_id, post_id, author_id, pub_date) {select} '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            params,
+        )
+
+
+def fan_out_range(first_pk, last_pk):
+    """Добавляет посты с id от first_pk до last_pk в ленты подписчиков
+    их авторов.
+
+    Один INSERT ... SELECT по индексу подписок авторов. Авторов,
+    у которых подписчиков больше TIMELINE_FANOUT_LIMIT, не рассылаем:
+    их посты лента подписок дочитывает сама (pull).
+    """
+    posts = Post._meta.db_table
+    follows = Follow._meta.db_table
+    counters = AuthorCounter._meta.db_table
+    _insert_entries(
+        f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+        f'FROM {posts} p INNER JOIN {follows} f '
+        f'ON f.author_id = p.author_id '
+        f'WHERE p.id BETWEEN %s AND %s AND NOT EXISTS ('
+        f'SELECT 1 FROM {counters} c '
+        f'WHERE c.author_id = p.author_id AND c.followers_count > %s)',
+        [first_pk, last_pk, settings.TIMELINE_FANOUT_LIMIT],
+    )
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    fan_out_range(post.pk, post.pk)
+
+
+def resume_fan_out(author_id):
+    """Возвращает рассылку автору, число подписчиков которого опустилось
+    до TIMELINE_FANOUT_LIMIT.
+
+    Пока автор был популярным, его посты не попадали в ленты, а теперь
+    лента подписок перестаёт их дочитывать. Поэтому последние
+    TIMELINE_BACKFILL постов автора переносятся в ленты всех его
+    подписчиков одним INSERT ... SELECT.
+    """
+    crossed = AuthorCounter.objects.filter(
+        author_id=author_id,
+        followers_count=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+    if not crossed:
+        return
+    posts = Post._meta.db_table
+    follows = Follow._meta.db_table
+    _insert_entries(
+        f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+        f'FROM {follows} f INNER JOIN ('
+        f'SELECT id, author_id, pub_date FROM {posts} '
+        f'WHERE author_id = %s ORDER BY pub_date DESC, id DESC LIMIT %s'
+        f') p ON p.author_id = f.author_id '
+        f'WHERE f.author_id = %s',
+        [author_id, settings.TIMELINE_BACKFILL, author_id],
+    )
+
+
+def backfill(user_id, author_id):
+    """Переносит последние посты автора в ленту нового подписчика."""
+    is_pulled = AuthorCounter.objects.filter(
+        author_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+    if is_pulled:
+        return
+    recent = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk').values_list('pk', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                          pub_date=pub_date)
+            for pk, pub_date in recent[:settings.TIMELINE_BACKFILL]
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def follow_page(user, cursor, per_page):
+    """Страница ленты подписок пользователя по курсору.
+
+    Посты приходят из двух источников: материализованной ленты
+    и постов авторов, которых не рассылают (pull). Из каждого
+    источника берётся не больше per_page + 1 ключей после курсора,
+    ключи сливаются, а посты страницы загружаются одним запросом.
+    """
+    posts = KeysetPaginator(Post.objects.for_feed(), per_page)
+    sources = [(
+        TimelineEntry.objects.filter(user=user)
+        .values_list('pub_date', 'post_id'),
+        ('-pub_date', '-post_id'),
+    )]
+    pulled = list(Follow.objects.filter(
+        user=user,
+        author__post_counter__followers_count__gt=(
+            settings.TIMELINE_FANOUT_LIMIT),
+    ).values_list('author_id', flat=True))
+    if pulled:
+        sources.append((
+            Post.objects.filter(author_id__in=pulled)
+            .values_list('pub_date', 'pk'),
+            ('-pub_date', '-pk'),
+        ))
+    keys = set()
+    for queryset, ordering in sources:
+        source = KeysetPaginator(queryset, per_page, ordering)
+        queryset, forward, values = source.cursor_queryset(cursor)
+        keys.update(queryset[:per_page + 1])
+    # Ключи (дата, id) одинаковы в обоих источниках, дубли схлопываются
+    keys = sorted(keys, reverse=forward)[:per_page + 1]
+    has_more = len(keys) > per_page
+    keys = keys[:per_page]
+    if not forward:
+        keys.reverse()
+    by_pk = posts.object_list.in_bulk([pk for _, pk in keys])
+    page_posts = [by_pk[pk] for _, pk in keys if pk in by_pk]
+    if forward:
+        return KeysetPage(page_posts, None, posts, has_next=has_more,
+                          has_previous=values is not None)
+    return KeysetPage(page_posts, None, posts, has_next=values is not None,
+                      has_previous=has_more)
@@ -1,23 +1,41 @@
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import condition, require_POST
 
+from core.paginator import KeysetPaginator
+from core.ratelimit import rate_limit
+from core.routers import read_replica
+
+from .export import CONTENT_TYPES, export_rows, parse_filters
+from .feed_cache import (GROUPS_FEED, INDEX_FEED, author_feed, cache_feed,
+                         feed_etag, feed_versions, group_feed, make_etag,
+                         replica_may_lag)
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import Follow, Group, Post, User
+from .search import attach_snippets, search_posts
+from .timeline import follow_page
 
 
-def paginator(request, post_list):
-    paginator = Paginator(post_list, settings.PAGE_LIMIT)
-    page_number = request.GET.get(settings.PAGE_NUMBER)
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+def paginator(request, post_list, ordering=('-pub_date', '-pk')):
+    paginator = KeysetPaginator(post_list, settings.PAGE_LIMIT, ordering)
+    cursor = request.GET.get(settings.PAGE_CURSOR)
+    if cursor is None and settings.PAGE_NUMBER in request.GET:
+        # Старые ссылки вида ?page=N продолжают работать через OFFSET
+        page_number = request.GET.get(settings.PAGE_NUMBER)
+        return paginator.get_page(page_number)
+    return paginator.get_cursor_page(cursor)
 
 
 # Главная страница
+@read_replica
+@condition(etag_func=feed_etag(lambda: INDEX_FEED))
+@cache_feed(lambda: INDEX_FEED)
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     page_obj = paginator(request, post_list)
     context = {
         'post_list': post_list,
@@ -27,10 +45,13 @@ def index(request):
 
 
 # Страница с постами сообщества.
+@read_replica
+@condition(etag_func=feed_etag(group_feed))
+@cache_feed(group_feed)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     # Получаем набор записей для страницы с запрошенным номером
     page_obj = paginator(request, post_list)
     context = {
@@ -40,19 +61,89 @@ def group_posts(request, slug):
     return render(request, template, context, slug)
 
 
+def _following(request, username):
+    """Подписан ли читатель на автора, один запрос на запрос клиента."""
+    if not hasattr(request, '_following'):
+        request._following = (
+            request.user.is_authenticated
+            and Follow.objects.filter(
+                user=request.user, author__username=username).exists()
+        )
+    return request._following
+
+
+def profile_etag(request, username):
+    # Кнопка подписки зависит от читателя, а подписка не сдвигает
+    # версию ленты автора. В форме подписки CSRF-токен: страница
+    # из кеша браузера со старым токеном (например, до нового входа)
+    # не прошла бы проверку, поэтому токен из куки входит в ETag
+    feeds = (author_feed(username), GROUPS_FEED)
+    if replica_may_lag(feeds):
+        return None
+    csrf = (request.META.get('CSRF_COOKIE')
+            if request.user.is_authenticated else None)
+    return make_etag(
+        request, *feed_versions(feeds), _following(request, username), csrf)
+
+
+@read_replica
+@condition(etag_func=profile_etag)
+@cache_feed(author_feed)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.filter()
+    author = get_object_or_404(
+        User.objects.select_related('post_counter'), username=username)
+    post_list = author.posts.for_feed()
     page_obj = paginator(request, post_list)
+    following = _following(request, username)
     context = {
         'page_obj': page_obj,
         'author': author,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = paginator(
+            request, search_posts(query), ordering=('rank', 'pk'))
+        attach_snippets(page_obj.object_list, query)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def _post_stamp(request, post_id):
+    """Время правки поста и имя автора, один запрос на запрос клиента."""
+    if not hasattr(request, '_post_stamp'):
+        request._post_stamp = Post.objects.filter(pk=post_id).values_list(
+            'updated', 'author__username').first()
+    return request._post_stamp
+
+
+def post_etag(request, post_id):
+    stamp = _post_stamp(request, post_id)
+    if stamp is None:
+        return None
+    updated, username = stamp
+    # Версия ленты автора меняется вместе с его числом постов на странице
+    versions = feed_versions((author_feed(username), GROUPS_FEED))
+    return make_etag(request, updated.isoformat(), *versions)
+
+
+# Last-Modified не отдаём: страница зависит и от версий лент автора
+# и групп, а у них нет даты, так что If-Modified-Since давал бы 304
+# после переименования группы
+@read_replica
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__post_counter', 'group'),
+        pk=post_id)
     context = {
         'post': post,
     }
@@ -60,8 +151,9 @@ def post_detail(request, post_id):
 
 
 @login_required
+@rate_limit('post_create')
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         form = form.save(commit=False)
         form.author = request.user
@@ -76,7 +168,8 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post)
     if form.is_valid():
         form.save()
         return redirect('posts:post_detail', post_id)
@@ -86,3 +179,54 @@ def post_edit(request, post_id):
         'is_edit': is_edit,
     }
     return render(request, 'posts/post_create.html', context)
+
+
+@login_required
+def follow_index(request):
+    """Лента постов авторов, на которых подписан пользователь."""
+    page_obj = follow_page(
+        request.user, request.GET.get(settings.PAGE_CURSOR),
+        settings.PAGE_LIMIT)
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    # delete() по одному объекту: обработчики чистят ленту и счётчик
+    for follow in Follow.objects.filter(user=request.user, author=author):
+        follow.delete()
+    return redirect('posts:profile', username)
+
+
+def bad_request(message):
+    # Текст ошибки содержит параметры запроса: отдаём его не как HTML
+    return HttpResponseBadRequest(
+        message, content_type='text/plain; charset=utf-8')
+
+
+@staff_member_required
+def export_posts(request):
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in CONTENT_TYPES:
+        return bad_request(f'Неизвестный формат: {fmt}')
+    try:
+        filters = parse_filters(
+            request.GET.get('author'), request.GET.get('group'),
+            request.GET.get('since'), request.GET.get('until'))
+    except ValueError as error:
+        return bad_request(str(error))
+    response = StreamingHttpResponse(
+        export_rows(fmt, filters), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="posts.{fmt}"'
+    return response
@@ -0,0 +1,35 @@
+from django.contrib import admin
+
+from core.changelist import KeysetChangeList
+
+from .models import Contact
+
+
+class ContactAdmin(admin.ModelAdmin):
+    list_display = ('created', 'name', 'email', 'subject', 'is_answered')
+    list_filter = ('is_answered',)
+    # Порядок совпадает с индексами contact_*_idx: листание по курсору
+    # идёт по индексу, а не сортирует всю таблицу
+    ordering = ('-created', '-pk')
+    sortable_by = ()
+    show_full_result_count = False
+    change_list_template = 'admin/keyset_change_list.html'
+    actions = ('mark_answered', 'mark_unanswered')
+    empty_value_display = '-пусто-'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def mark_answered(self, request, queryset):
+        # Один UPDATE на всю выборку, в том числе «выбрать все»
+        updated = queryset.update(is_answered=True)
+        self.message_user(request, f'Отмечено отвеченными: {updated}')
+    mark_answered.short_description = 'Отметить как отвеченные'
+
+    def mark_unanswered(self, request, queryset):
+        updated = queryset.update(is_answered=False)
+        self.message_user(request, f'Возвращено в работу: {updated}')
+    mark_unanswered.short_description = 'Вернуть в неотвеченные'
+
+
+admin.site.register(Contact, ContactAdmin)
@@ -0,0 +1,171 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def to_row(message, contact=None):
+    """Строка очереди для письма Django."""
+    html_body = ''
+    for content, mimetype in getattr(message, 'alternatives', ()):
+        if mimetype == 'text/html':
+            html_body = content
+    return OutgoingEmail(
+        contact=contact,
+        subject=message.subject,
+        body=message.body,
+        html_body=html_body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(message.recipients()),
+        reply_to='\n'.join(message.reply_to),
+    )
+
+
+def to_message(row, connection=None):
+    message = EmailMultiAlternatives(
+        row.subject, row.body, row.from_email, row.recipients.split('\n'),
+        reply_to=row.reply_to.split('\n') if row.reply_to else None,
+        connection=connection,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, 'text/html')
+    return message
+
+
+def queue_mail(message, contact=None):
+    """Ставит письмо в очередь и сразу возвращает строку очереди."""
+    row = to_row(message, contact)
+    row.save()
+    return row
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только пишет письма в очередь.
+
+    Через него идут письма сброса пароля и регистрации: запрос
+    не ждёт SMTP, а отправляет их send_queued_mail через
+    OUTBOX_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [to_row(message) for message in email_messages]
+        OutgoingEmail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой: удваивается, но не больше часа."""
+    seconds = settings.OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, 60 * 60))
+
+
+def claim_batch(size):
+    """Забирает до size готовых к отправке писем.
+
+    Письма помечаются меткой обработчика одним UPDATE, а send_after
+    сдвигается на время аренды: параллельные обработчики не возьмут
+    то же письмо, а письмо упавшего обработчика вернётся в очередь.
+    """
+    now = timezone.now()
+    claim = uuid.uuid4().hex
+    ready = list(OutgoingEmail.objects.filter(
+        is_sent=False, is_failed=False, send_after__lte=now,
+    ).order_by('send_after').values_list('pk', flat=True)[:size])
+    if not ready:
+        return []
+    OutgoingEmail.objects.filter(
+        pk__in=ready, send_after__lte=now,
+    ).update(
+        claim=claim,
+        send_after=now + timedelta(seconds=settings.OUTBOX_LEASE),
+    )
+    # Перечитываем по первичному ключу; метка отсеивает письма, которые
+    # между SELECT и UPDATE забрал другой обработчик
+    return list(OutgoingEmail.objects.filter(pk__in=ready, claim=claim))
+
+
+def purge_sent(days=None, chunk_size=1000):
+    """Удаляет письма, отправленные больше days дней назад.
+
+    По умолчанию days - OUTBOX_RETENTION_DAYS. Удаляет кусками
+    по chunk_size, чтобы не держать долгую блокировку таблицы.
+    Недоставленные письма остаются для разбора. Возвращает число
+    удалённых писем.
+    """
+    days = settings.OUTBOX_RETENTION_DAYS if days is None else days
+    old = OutgoingEmail.objects.filter(
+        is_sent=True, sent_at__lt=timezone.now() - timedelta(days=days),
+    ).order_by().values_list('pk', flat=True)
+    deleted = 0
+    while True:
+        pks = list(old[:chunk_size])
+        if not pks:
+            return deleted
+        deleted += OutgoingEmail.objects.filter(pk__in=pks).delete()[0]
+
+
+def send_chunk(rows):
+    """Отправляет письма через одно соединение с почтовым сервером.
+
+    Возвращает пары (письмо, текст ошибки или None). Работает
+    в потоке и не обращается к базе.
+    """
+    results = []
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        return [(row, repr(error)) for row in rows]
+    try:
+        for row in rows:
+            try:
+                connection.send_messages([to_message(row, connection)])
+            except Exception as error:
+                results.append((row, repr(error)))
+            else:
+                results.append((row, None))
+    finally:
+        connection.close()
+    return results
+
+
+def deliver(rows, workers):
+    """Отправляет письма в workers потоков и записывает результат.
+
+    Возвращает (отправлено, ошибок).
+    """
+    if not rows:
+        return 0, 0
+    chunks = [rows[index::workers] for index in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [
+            result
+            for chunk_results in executor.map(send_chunk, filter(None, chunks))
+            for result in chunk_results
+        ]
+    now = timezone.now()
+    sent = [row.pk for row, error in results if error is None]
+    failed = [(row, error) for row, error in results if error is not None]
+    with transaction.atomic():
+        OutgoingEmail.objects.filter(pk__in=sent).update(
+            is_sent=True, sent_at=now, claim='', last_error='',
+            attempts=F('attempts') + 1,
+        )
+        for row, error in failed:
+            row.attempts += 1
+            row.claim = ''
+            row.last_error = error
+            row.is_failed = row.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+            row.send_after = now + retry_delay(row.attempts)
+            row.save(update_fields=[
+                'attempts', 'claim', 'last_error', 'is_failed', 'send_after',
+            ])
+    return len(sent), len(failed)
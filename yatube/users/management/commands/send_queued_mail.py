@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.mail import claim_batch, deliver, purge_sent
+
+# Как часто в режиме --loop удаляются старые отправленные письма
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди пачками в несколько потоков; '
+            'неудачные попытки повторяются с растущей паузой, '
+            'отправленные письма старше OUTBOX_RETENTION_DAYS удаляются')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            '--workers', type=int, default=settings.OUTBOX_WORKERS)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новые письма')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза в секундах между проверками очереди в режиме --loop')
+
+    def handle(self, *args, **options):
+        next_purge = 0
+        while True:
+            if time.monotonic() >= next_purge:
+                purged = purge_sent()
+                next_purge = time.monotonic() + PURGE_INTERVAL
+                if purged:
+                    self.stdout.write(f'Удалено старых писем: {purged}')
+            rows = claim_batch(options['batch_size'])
+            if rows:
+                sent, failed = deliver(rows, options['workers'])
+                self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='contact',
+            options={'verbose_name': 'Обращение', 'verbose_name_plural': 'Обращения'},
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата обращения'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='is_answered',
+            field=models.BooleanField(default=False, verbose_name='Отвечено'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['is_answered', '-created', '-id'], name='contact_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['-created', '-id'], name='contact_created_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from .validators import validate_not_empty
 
@@ -14,4 +15,67 @@ class Contact(models.Model):
     subject = models.CharField('Тема письма', max_length=100)
     # К полю body тоже подключаем валидатор, проверяющий, что поле не пустое.
     body = models.TextField('Сообщение', validators=[validate_not_empty])
-    is_answered = models.BooleanField(default=False)
+    is_answered = models.BooleanField('Отвечено', default=False)
+    created = models.DateTimeField('Дата обращения', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Обращение'
+        verbose_name_plural = 'Обращения'
+        indexes = [
+            # Входящие: неотвеченные обращения от новых к старым
+            models.Index(
+                fields=['is_answered', '-created', '-id'],
+                name='contact_inbox_idx',
+            ),
+            models.Index(
+                fields=['-created', '-id'], name='contact_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку.
+
+    Представления только записывают сюда письма и сразу отвечают,
+    доставкой занимается команда send_queued_mail.
+    """
+    contact = models.ForeignKey(
+        Contact,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+        verbose_name='Обращение',
+    )
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    html_body = models.TextField('HTML-версия', blank=True)
+    from_email = models.CharField('Отправитель', max_length=254)
+    # Адреса по одному на строку
+    recipients = models.TextField('Получатели')
+    reply_to = models.TextField('Ответить на', blank=True)
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+    send_after = models.DateTimeField(
+        'Отправить не раньше', default=timezone.now)
+    # Метка обработчика, который взял письмо в работу
+    claim = models.CharField(max_length=32, blank=True, editable=False)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    is_sent = models.BooleanField('Отправлено', default=False)
+    is_failed = models.BooleanField('Не доставлено', default=False)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['is_sent', 'is_failed', 'send_after'],
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.changelist import KeysetChangeList
+
+from ..models import Contact
+
+User = get_user_model()
+CHANGELIST = reverse('admin:users_contact_changelist')
+
+
+class ContactAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        Contact.objects.bulk_create(
+            Contact(name=f'Гость {index}', email='guest@example.com',
+                    subject=f'Спасибо {index}', body='Текст',
+                    is_answered=index % 2 == 0)
+            for index in range(250)
+        )
+        # bulk_create проставил одно и то же время, разведём его
+        now = timezone.now()
+        for contact in Contact.objects.all():
+            Contact.objects.filter(pk=contact.pk).update(
+                created=now - timedelta(minutes=contact.pk))
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_changelist_pages_by_cursor(self):
+        """Листание входящих идёт по курсору без повторов и пропусков."""
+        url = f'{CHANGELIST}?is_answered__exact=0'
+        seen = []
+        while url:
+            response = self.admin_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            changelist = response.context['cl']
+            self.assertEqual(changelist.result_count, 125)
+            seen.extend(contact.pk for contact in changelist.result_list)
+            url = changelist.next_url and CHANGELIST + changelist.next_url
+        expected = list(Contact.objects.filter(is_answered=False).order_by(
+            '-created', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_changelist_count_is_bounded(self):
+        """Число записей считается по LIMIT-подзапросу, а не по всей
+        таблице."""
+        for url in (CHANGELIST, f'{CHANGELIST}?is_answered__exact=0'):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.admin_client.get(url)
+                counts = [
+                    query['sql'] for query in queries
+                    if 'COUNT(' in query['sql']
+                    and 'users_contact' in query['sql']
+                ]
+                self.assertEqual(len(counts), 1)
+                self.assertIn('LIMIT', counts[0])
+
+    def test_changelist_count_caps_at_limit(self):
+        with mock.patch.object(KeysetChangeList, 'count_limit', 100):
+            response = self.admin_client.get(CHANGELIST)
+        self.assertEqual(response.context['cl'].result_count, 100)
+        self.assertContains(response, 'более 100')
+
+    def test_mark_answered_is_one_update(self):
+        """Действие над всей выборкой - один UPDATE."""
+        with CaptureQueriesContext(connection) as queries:
+            self.admin_client.post(CHANGELIST + '?is_answered__exact=0', {
+                'action': 'mark_answered',
+                'select_across': '1',
+                'index': '0',
+                '_selected_action': ['1'],
+            })
+        updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE "users_contact"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Contact.objects.filter(is_answered=False).exists())
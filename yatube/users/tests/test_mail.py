@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..mail import claim_batch
+from ..models import Contact, OutgoingEmail
+
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class BrokenBackend:
+    """Почтовый бэкенд, у которого не открывается соединение."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def open(self):
+        raise ConnectionRefusedError('SMTP недоступен')
+
+    def close(self):
+        pass
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxEmailBackend',
+    OUTBOX_DELIVERY_BACKEND=LOCMEM,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+
+    def send_contact(self):
+        return self.guest_client.post(reverse('users:contact'), {
+            'name': 'Имя',
+            'email': 'guest@example.com',
+            'subject': 'Спасибо',
+            'body': 'Текст',
+        })
+
+    def test_contact_mail_is_queued(self):
+        """Обращение ставит письмо в очередь, а не отправляет его."""
+        response = self.send_contact()
+        self.assertRedirects(response, reverse('users:thankyou'))
+        contact = Contact.objects.get()
+        email = contact.emails.get()
+        self.assertEqual(email.reply_to, 'guest@example.com')
+        self.assertFalse(email.is_sent)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_password_reset_mail_is_queued(self):
+        self.guest_client.post(reverse('users:signup'), {
+            'username': 'reader',
+            'email': 'reader@example.com',
+            'password1': 'Pa55-word-long',
+            'password2': 'Pa55-word-long',
+        })
+        self.guest_client.post(
+            reverse('users:password_reset'), {'email': 'reader@example.com'})
+        self.assertEqual(
+            OutgoingEmail.objects.filter(
+                recipients='reader@example.com').count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_worker_delivers_queued_mail(self):
+        self.send_contact()
+        call_command('send_queued_mail', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['kaspeya@yandex.com'])
+        email = OutgoingEmail.objects.get()
+        self.assertTrue(email.is_sent)
+        self.assertEqual(email.attempts, 1)
+
+    @override_settings(
+        OUTBOX_DELIVERY_BACKEND=f'{__name__}.BrokenBackend',
+        OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_failed_delivery_is_retried_later(self):
+        """Неудача откладывает письмо, а после лимита попыток
+        оно помечается недоставленным."""
+        self.send_contact()
+        call_command('send_queued_mail', stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertFalse(email.is_failed)
+        self.assertGreater(email.send_after, timezone.now())
+        self.assertIn('SMTP недоступен', email.last_error)
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        call_command('send_queued_mail', stdout=StringIO())
+        email.refresh_from_db()
+        self.assertTrue(email.is_failed)
+        self.assertFalse(email.is_sent)
+
+    def test_claimed_mail_is_read_by_primary_key(self):
+        """Взятые письма перечитываются по первичному ключу, а не по метке
+        claim без индекса."""
+        self.send_contact()
+        with self.assertNumQueries(3) as context:
+            rows = claim_batch(10)
+        self.assertEqual(len(rows), 1)
+        self.assertIn('"id" IN', context.captured_queries[-1]['sql'])
+        self.assertEqual(claim_batch(10), [])
+
+    @override_settings(OUTBOX_RETENTION_DAYS=30)
+    def test_old_sent_mail_is_purged(self):
+        """Отправленные письма старше срока хранения удаляются,
+        недоставленные остаются."""
+        for _ in range(3):
+            self.send_contact()
+        old = timezone.now() - timedelta(days=31)
+        first, second, third = OutgoingEmail.objects.order_by('pk')
+        OutgoingEmail.objects.filter(pk=first.pk).update(
+            is_sent=True, sent_at=old)
+        OutgoingEmail.objects.filter(pk=second.pk).update(
+            is_sent=True, sent_at=timezone.now())
+        OutgoingEmail.objects.filter(pk=third.pk).update(
+            is_failed=True, sent_at=old)
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        self.assertIn('Удалено старых писем: 1', out.getvalue())
+        self.assertQuerysetEqual(
+            OutgoingEmail.objects.order_by('pk'), [second.pk, third.pk],
+            transform=lambda email: email.pk)
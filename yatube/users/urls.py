@@ -7,6 +7,8 @@ from django.contrib.auth.views import (LoginView, LogoutView,
                                        PasswordResetView)
 from django.urls import path, reverse_lazy
 
+from core.ratelimit import rate_limit
+
 from . import views
 
 app_name = 'users'
@@ -22,13 +24,17 @@ urlpatterns = [
 
     path(
         'signup/',
-        views.SignUp.as_view(template_name='users/signup.html'),
+        rate_limit('signup')(
+            views.SignUp.as_view(template_name='users/signup.html')
+        ),
         name='signup'
     ),
 
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        rate_limit('login')(
+            LoginView.as_view(template_name='users/login.html')
+        ),
         name='login'
     ),
 
@@ -88,7 +94,9 @@ urlpatterns = [
     ),
     path(
         'contact/',
-        views.Contact.as_view(template_name='users/contact.html'),
+        rate_limit('contact')(
+            views.Contact.as_view(template_name='users/contact.html')
+        ),
         name='contact'
     ),
     path(
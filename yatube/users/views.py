@@ -1,4 +1,5 @@
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import EmailMessage, send_mail
 from django.shortcuts import redirect, render
 # Функция reverse_lazy позволяет получить URL по параметрам функции path()
 from django.urls import reverse_lazy
@@ -6,6 +7,7 @@ from django.views.generic import CreateView
 
 # Импортируем класс формы, чтобы сослаться на неё во view-классе
 from .forms import ContactForm, CreationForm
+from .mail import queue_mail
 
 
 class SignUp(CreateView):
@@ -14,14 +16,32 @@ class SignUp(CreateView):
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if self.object.email:
+            # Письмо уходит в очередь, регистрация не ждёт SMTP
+            send_mail(
+                'Добро пожаловать в Yatube',
+                f'{self.object.username}, вы зарегистрированы на Yatube.',
+                None, [self.object.email],
+            )
+        return response
+
 
 class Contact(CreateView):
     form_class = ContactForm
     success_url = reverse_lazy('users:thankyou')
     template_name = 'users/contact.html'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        contact = self.object
+        send_msg(contact.email, contact.name, contact.subject, contact.body,
+                 contact=contact)
+        return response
+
 
-def send_msg(email, name, title, body):
+def send_msg(email, name, title, body, contact=None):
     subject = f"Письмо от {name}"
     body = f"""Cообщение администратору
 
@@ -30,9 +50,11 @@ def send_msg(email, name, title, body):
     Cообщение: {body}
 
     """
-    send_mail(
-        subject, body, email, ["kaspeya@yandex,com"],
+    message = EmailMessage(
+        subject, body, settings.DEFAULT_FROM_EMAIL, [settings.CONTACT_EMAIL],
+        reply_to=[email],
     )
+    queue_mail(message, contact=contact)
 
 
 def user_contact(request):
@@ -43,8 +65,7 @@ def user_contact(request):
             email = form.cleaned_data['email']
             title = form.cleaned_data['title']
             body = form.cleaned_data['body']
-            send_msg(name, email, title, body)
-            print('123')
+            send_msg(email, name, title, body)
             return redirect('users:thankyou')
         return render(request, 'contact.html', {'form': form})
     form = ContactForm()
@@ -0,0 +1,19 @@
+"""
+Настройки выбираются переменной окружения YATUBE_ENV:
+dev (по умолчанию), test или prod.
+"""
+
+import os
+
+ENVIRONMENT = os.environ.get('YATUBE_ENV', 'dev')
+
+if ENVIRONMENT == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif ENVIRONMENT == 'test':
+    from .test import *  # noqa: F401,F403
+elif ENVIRONMENT == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(
+        f'Неизвестное окружение YATUBE_ENV={ENVIRONMENT!r}: '
+        'ожидается dev, test или prod')
@@ -0,0 +1,289 @@
+"""
+Django settings for yatube project: общие для всех окружений.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = '7aytgf1e)90nv2e57k1jp4tof)!a)-=mvj6vmazjn1ikwsh8d)'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+# Application definition
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.QueryLogMiddleware',
+    'core.middleware.StickyPrimaryMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Добавлено: Искать шаблоны на уровне проекта
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ]
+        },
+    }
+]
+
+# Компилировать все шаблоны из TEMPLATES_DIR при старте WSGI-процесса
+# (имеет смысл с кеширующим загрузчиком, см. prod)
+TEMPLATE_WARMUP = False
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Сколько секунд ждать снятия блокировки записи
+        'OPTIONS': {'timeout': 20},
+    },
+    # Копия основной базы только для чтения: файл, который обновляет
+    # внешняя репликация. В тестах это отдельная база в памяти, схему
+    # в неё накатывают сами тесты реплики.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+        'OPTIONS': {'timeout': 20},
+    },
+}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Псевдонимы баз, из которых читают ленты и страница поста.
+# Пустой список - всё читается из default.
+DATABASE_REPLICAS = []
+# Сколько секунд после записи пользователь читает из default
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_COOKIE = 'primary_until'
+
+# PRAGMA для каждого нового соединения SQLite. В режиме WAL читатели
+# не ждут пишущую транзакцию (например, post_create), а запись
+# не ждёт читателей; synchronous=NORMAL в WAL безопасен для данных.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ, а не в страницах
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# Для нескольких процессов нужен общий кеш, например memcached
+# (см. settings/prod.py)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+    }
+}
+
+FEED_CACHE_ALIAS = 'default'
+FEED_CACHE_TIMEOUT = 60 * 5
+# RSS/Atom: число записей в ленте и время жизни готового XML в кеше.
+# Ключ включает версию ленты, поэтому новый пост сбрасывает XML сразу,
+# а срок лишь ограничивает память под давно не читанные ленты.
+SYNDICATION_ITEMS = 20
+SYNDICATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Ограничение частоты отправки форм: корзина токенов на IP клиента
+# и на вошедшего пользователя, формат 'запросов/период' (s, m, h, d).
+# Для нескольких процессов укажите алиас общего кеша.
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# За обратным прокси REMOTE_ADDR - адрес прокси, и все клиенты делили бы
+# одну корзину. Тогда укажите ключ request.META заголовка, который прокси
+# заполняет адресом клиента, например 'HTTP_X_REAL_IP' или
+# 'HTTP_X_FORWARDED_FOR'; None - брать REMOTE_ADDR.
+RATE_LIMIT_IP_HEADER = None
+RATE_LIMITS = {
+    'post_create': {'user': '10/m', 'ip': '30/m'},
+    'signup': {'ip': '10/h'},
+    'contact': {'user': '5/m', 'ip': '20/h'},
+    'login': {'ip': '20/m'},
+}
+
+# Доля запросов, для которых собираются метрики и Server-Timing
+REQUEST_METRICS_SAMPLE_RATE = 0.1
+
+# Журнал запросов к БД: порог медленного запроса, допустимые повторы
+# одной формы запроса и бюджет запросов на HTTP-запрос (None - без
+# ограничения). QUERY_BUDGET_STRICT превращает превышение в ошибку.
+SLOW_QUERY_MS = 100
+DUPLICATE_QUERY_LIMIT = 5
+QUERY_BUDGET = None
+QUERY_BUDGET_STRICT = False
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'Europe/Moscow'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Отдавать STATIC_ROOT из Django (core.middleware.StaticFilesMiddleware),
+# если перед приложением нет веб-сервера со статикой
+SERVE_STATIC = False
+# Время кеширования статики без хеша в имени
+STATIC_MAX_AGE = 60 * 60
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Если задан, файлы из MEDIA_ROOT отдаёт веб-сервер по внутреннему
+# адресу из заголовка X-Accel-Redirect (nginx), а не Django
+MEDIA_ACCEL_REDIRECT = None
+
+# Миниатюры картинок постов для ленты: ширины для srcset, каталог
+# в MEDIA_ROOT и число процессов, которые их создают (0 - создавать
+# сразу в процессе, сохранившем пост)
+THUMBNAIL_WIDTHS = (320, 640, 960)
+THUMBNAIL_DIR = 'thumbs'
+THUMBNAIL_WORKERS = 2
+
+# Лента подписок: посты авторов, у которых подписчиков больше
+# TIMELINE_FANOUT_LIMIT, не рассылаются по лентам, а дочитываются
+# при показе. TIMELINE_BACKFILL - сколько последних постов автора
+# попадает в ленту при подписке.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL = 100
+
+PAGE_LIMIT = 10
+PAGE_NUMBER = 'page'
+PAGE_CURSOR = 'cursor'
+
+# JSON API: размер страницы по умолчанию, наибольший ?limit=
+# и наибольшее число id в одном запросе ?ids=
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_MAX_IDS = 100
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+LOGOUT_REDIRECT_URL = ''
+PASSWORD_CHANGE_URL = 'users:password_change'
+PASSWORD_CHANGE_REDIRECT_URL = 'users:password_change_done'
+PASSWORD_RESET_URL = 'users:password_reset'
+PASSWORD_RESET_REDIRECT_URL = 'users:password_reset_done'
+PASSWORD_RESET_CONFIRM_URL = 'users:password_reset_confirm'
+PASSWORD_RESET_CONFIRM_REDIRECT_URL = 'users:password_reset_complete'
+POST_EDIT_REDIRECT_URL = 'posts:post_detail'
+
+# Письма пишутся в очередь, отправляет их команда send_queued_mail
+# через OUTBOX_DELIVERY_BACKEND
+EMAIL_BACKEND = 'users.mail.OutboxEmailBackend'
+OUTBOX_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'noreply@yatube.ru'
+CONTACT_EMAIL = 'kaspeya@yandex.com'
+
+# Писем за один проход обработчика и число потоков отправки
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_WORKERS = 4
+# После OUTBOX_MAX_ATTEMPTS неудач письмо помечается недоставленным.
+# Пауза между попытками начинается с OUTBOX_RETRY_DELAY секунд
+# и удваивается.
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+# Сколько секунд письмо закреплено за взявшим его обработчиком
+OUTBOX_LEASE = 10 * 60
+# Отправленные письма хранятся OUTBOX_RETENTION_DAYS дней, потом
+# send_queued_mail их удаляет
+OUTBOX_RETENTION_DAYS = 30
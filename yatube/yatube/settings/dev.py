@@ -0,0 +1,11 @@
+"""
+Настройки для локальной разработки.
+"""
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
+
+# Соединение открывается заново на каждый запрос: runserver
+# перезапускается часто, а держать файл базы открытым незачем
+CONN_MAX_AGE = 0
@@ -0,0 +1,65 @@
+"""
+Настройки для боевого окружения.
+
+Запуск: YATUBE_ENV=prod
+"""
+
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import ALLOWED_HOSTS, SECRET_KEY, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = ALLOWED_HOSTS + [
+    host for host in os.environ.get('YATUBE_ALLOWED_HOSTS', '').split(',')
+    if host
+]
+
+# Соединение с БД переживает запрос: не тратим время на открытие файла
+# и PRAGMA на каждый запрос. Перед использованием Django проверяет,
+# что соединение живо.
+CONN_MAX_AGE = 600
+
+# Версии лент, ETag, кеш страниц и RSS и корзины ограничения частоты
+# должны быть общими для всех процессов: иначе запись в одном процессе
+# не сбрасывает кеш остальных, и они отдают устаревшие страницы и 304.
+# memcached атомарно выполняет incr и add для версий лент и вытесняет
+# старые ключи сам, без обхода каталога на каждую запись, как у
+# FileBasedCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_MEMCACHED', '127.0.0.1:11211').split(','),
+    }
+}
+
+# Шаблоны читаются и разбираются один раз на процесс, дальше
+# используются скомпилированные копии из памяти
+TEMPLATES = [
+    {
+        **backend,
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **backend['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    }
+    for backend in TEMPLATES
+]
+
+# collectstatic добавляет хеш содержимого к именам и пишет сжатые
+# копии; {% static %} ссылается на имена с хешем
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+SERVE_STATIC = True
+
+# Компилировать все шаблоны из templates/ при старте WSGI-процесса
+TEMPLATE_WARMUP = True
@@ -0,0 +1,21 @@
+"""
+Настройки для прогона тестов.
+
+Запуск: YATUBE_ENV=test python manage.py test
+"""
+
+from .base import *  # noqa: F401,F403
+from .base import SQLITE_PRAGMAS
+
+DEBUG = False
+
+# Быстрый хешер: тестам не нужна стойкость паролей
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Тестовая база SQLite живёт в памяти, WAL для неё неприменим
+SQLITE_PRAGMAS = {
+    name: value for name, value in SQLITE_PRAGMAS.items()
+    if name != 'journal_mode'
+}